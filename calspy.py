@@ -1,21 +1,114 @@
 """
 Main entry point for the calendar scraping and processing tool.
 Handles the scraping of Google Calendar data and HTML generation.
+
+Subcommands import only what they use, so rendering and querying never load Selenium, Chrome or Rich.
+Without a subcommand, the arguments are passed to scrape, like earlier versions did.
 """
 
-from src.scraper import main as scraper_main
-from src.generate_calendar import generate_calendar
+import importlib
+import os
+import subprocess
 import sys
-import argparse
 from src.version import __version__
 
-def main():
-    parser = argparse.ArgumentParser(description='Calendar scraping and processing tool')
-    parser.add_argument('-v', '--version', action='version', version=f'calspy {__version__}')
-    args = parser.parse_args()
+# Subcommand: (module, description). Each module has a main(argv) entry point and is only imported when run.
+COMMANDS = {
+    'scrape': ('src.scraper', 'Scrape a calendar (the default, see README for its options)'),
+    'render': ('src.generate_calendar', 'Generate the HTML report of a scraped calendar'),
+    'query': ('src.timeline', 'Search the events of every scraped calendar (timeline query)'),
+    'timeline': ('src.timeline', 'Render, query or list the merged timeline of every scraped calendar'),
+    'export': ('src.export', 'Export a scraped calendar to NDJSON, CSV, iCal or columnar files'),
+    'bench': ('src.bench', 'Benchmark the scraper offline against recorded pages'),
+}
+
+# Arguments put in front of a command's own, for shortcuts to a subcommand of their module
+COMMAND_PREFIXES = {
+    'query': ['query'],
+}
+
+# Modules that only scraping needs
+HEAVY_MODULES = ('selenium', 'undetected_chromedriver', 'bs4', 'rich', 'webbrowser')
+
+# Seconds each subcommand may spend importing its module, checked by `calspy.py imports`
+IMPORT_BUDGETS = {
+    'render': 0.5,
+    'query': 0.3,
+    'timeline': 0.3,
+    'export': 0.3,
+    'bench': 0.5,
+}
+
+USAGE = f"""usage: calspy.py [-v] [command] [options]
+
+commands:
+{chr(10).join(f'  {name:<10}{description}' for name, (_, description) in COMMANDS.items())}
+  imports   Check that each command imports within its time budget
+
+Run `calspy.py <command> -h` for the options of a command."""
+
+def run_command(name, argv):
+    module = importlib.import_module(COMMANDS[name][0])
+    return module.main(COMMAND_PREFIXES.get(name, []) + argv)
+
+def measure_import(name):
+    """
+    Imports a command's module in a fresh interpreter.
+    Returns (seconds the import took, heavy modules it pulled in), raises ImportError if it cannot be imported.
+    """
+    script = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {COMMANDS[name][0]}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(elapsed, ' '.join(heavy))\n"
+    )
+    result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise ImportError(f"could not import {COMMANDS[name][0]}: {result.stderr.strip().splitlines()[-1]}")
+    elapsed, _, heavy = result.stdout.strip().partition(' ')
+    return float(elapsed), heavy.split()
+
+def check_imports():
+    """
+    Imports each command's module in a fresh interpreter and reports how long it took and which heavy modules it
+    pulled in. Returns False if a command is over its budget or imports scraping dependencies it does not need.
+    """
+    passed = True
+    for name, budget in IMPORT_BUDGETS.items():
+        try:
+            elapsed, heavy = measure_import(name)
+        except ImportError as e:
+            print(f"{name:<10} FAIL  {e}")
+            passed = False
+            continue
+
+        heavy = ','.join(heavy)
+        ok = elapsed <= budget and not heavy
+        passed = passed and ok
+        details = f"  imports {heavy}" if heavy else ''
+        print(f"{name:<10} {'ok  ' if ok else 'FAIL'}  {elapsed * 1000:6.0f}ms (budget {budget * 1000:.0f}ms){details}")
+    return passed
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in ('-v', '--version'):
+        print(f"calspy {__version__}")
+        return
+    if argv and argv[0] in ('-h', '--help'):
+        print(USAGE)
+        return
+    if argv and argv[0] == 'imports':
+        sys.exit(0 if check_imports() else 1)
+
+    name = 'scrape'
+    if argv and argv[0] in COMMANDS:
+        name, argv = argv[0], argv[1:]
 
     try:
-        scraper_main()
+        run_command(name, argv)
     except KeyboardInterrupt:
         print("\nProcess interrupted by user")
         sys.exit(0)
@@ -0,0 +1,262 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+from rich.table import Table
+from src import browser, metrics, scraper
+from src.journal import EventJournal, compact_journal
+
+logger = logging.getLogger('scraper')
+
+class DriverPool:
+    """
+    Bounded pool of Chrome drivers that are kept open and reused across calendars.
+    Drivers are started lazily, so the pool never starts more than it needs.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.Semaphore(size)
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Returns an idle driver, starting a new one if none is available
+        """
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        try:
+            driver = scraper.setup_driver()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._drivers.append(driver)
+        return driver
+
+    def release(self, driver, healthy=True):
+        """
+        Returns a driver to the pool, or closes it if it is no longer usable
+        """
+        if healthy:
+            self._idle.put(driver)
+        else:
+            self._discard(driver)
+        self._slots.release()
+
+    def _discard(self, driver):
+        with self._lock:
+            if driver in self._drivers:
+                self._drivers.remove(driver)
+        try:
+            browser.quit_driver(driver)
+        except Exception as e:
+            logger.warning(f"Error closing Chrome driver: {str(e)}")
+
+    def close(self):
+        """
+        Closes every driver started by the pool
+        """
+        with self._lock:
+            drivers = list(self._drivers)
+            self._drivers.clear()
+        for driver in drivers:
+            try:
+                browser.quit_driver(driver)
+            except Exception as e:
+                logger.warning(f"Error closing Chrome driver: {str(e)}")
+
+def read_calendar_urls(path):
+    """
+    Reads calendar URLs from a file, one per line. Blank lines and lines starting with # are ignored.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+def scrape_calendar(get_driver, url, calendar_id, progress, max_empty_months=18, target_months=None,
+                    resume=True, fresh_months=2, source='auto'):
+    """
+    Scrapes one calendar into its own run directory, reading the iCal feed first when source allows it.
+    get_driver is only called if the calendar has to be scraped in the browser, get_driver(restart=True)
+    replaces a driver that died.
+    Returns (json_path, event_count, run_dir)
+    """
+    run_dir = scraper.create_calendar_directory(calendar_id)
+    journal = EventJournal(calendar_id, run_dir)
+    try:
+        previous = scraper.carry_previous_runs(journal) if resume else {}
+
+        if source in ('auto', 'ics'):
+            try:
+                scraper.ingest_ics(calendar_id, journal, target_months)
+                return finish_calendar(journal, run_dir, calendar_id)
+            except Exception as e:
+                if source == 'ics':
+                    raise
+                logger.debug(f"iCal feed not available for {calendar_id}: {str(e)}")
+
+        skip_months = scraper.months_to_skip(previous, fresh_months) if resume else {}
+        driver = get_driver()
+
+        logger.debug(f"Accessing URL: {url}")
+        with metrics.timed('page_load'):
+            driver.get(url)
+        if not scraper.wait_for_calendar_load(driver):
+            raise Exception("Calendar failed to load")
+        scraper.wait_for_initial_render(driver)
+
+        try:
+            scraper.scrape_direction(driver, max_empty_months, target_months, progress=progress, collect=False,
+                                     journal=journal, url=url, skip_months=skip_months, label=calendar_id,
+                                     keep_events=False, restart_driver=lambda: get_driver(restart=True))
+        except Exception:
+            # Keep the months read before the walk gave up, as a partial snapshot
+            finish_calendar(journal, run_dir, calendar_id, final=False)
+            raise
+    finally:
+        journal.close()
+
+    return finish_calendar(journal, run_dir, calendar_id)
+
+def finish_calendar(journal, run_dir, calendar_id, final=None):
+    """
+    Closes the journal and compacts it into the calendar's snapshot file (and the event store, if enabled)
+    final: whether the snapshot is final, defaults to whether the scrape was not interrupted
+    """
+    journal.close()
+    final = scraper.running if final is None else final
+    json_path, events = compact_journal(run_dir, calendar_id, final=final)
+    if scraper.event_store and events:
+        scraper.event_store.write_snapshot(calendar_id, events, 'final' if final else 'partial')
+    return json_path, len(events), run_dir
+
+def write_batch_report(results):
+    """
+    Writes the batch summary and metrics to calendars/batch_<timestamp>.json and returns its path
+    """
+    calendars_dir = os.path.join(os.getcwd(), 'calendars')
+    os.makedirs(calendars_dir, exist_ok=True)
+    report_path = os.path.join(calendars_dir, f"batch_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    data = {
+        'batch_timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'calendars': results,
+        'metrics': metrics.snapshot()
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return report_path
+
+def print_batch_report(results, report_path):
+    """
+    Prints a summary table of the batch
+    """
+    table = Table(title="Batch summary")
+    table.add_column("Calendar")
+    table.add_column("Status")
+    table.add_column("Events", justify="right")
+    table.add_column("Seconds", justify="right")
+    for result in results:
+        status = "[green]ok[/]" if result['status'] == 'ok' else f"[red]{result['status']}[/]"
+        table.add_row(result['calendar_id'] or result['url'], status, str(result['events']),
+                      f"{result['seconds']:.1f}")
+    scraper.console.print(table)
+    scraper.console.print(f"[green]Batch report written to[/] [blue]{report_path}[/]")
+
+def run_batch(urls_path, workers=1, max_empty_months=18, target_months=None, resume=True, fresh_months=2,
+              source='auto', prometheus_path=None):
+    """
+    Scrapes every calendar listed in urls_path, reusing a pool of `workers` Chrome drivers.
+    Calendars with a public iCal feed are read from the feed without a driver unless source is 'browser'.
+    Each calendar is written to its usual calendars/<calendar_id>/ layout.
+    Metrics cover the whole batch and are stored in the batch report (and prometheus_path, if set).
+    Returns the per-calendar results.
+    """
+    urls = read_calendar_urls(urls_path)
+    metrics.reset()
+    scraper.console.print(f"[green]Batch scraping {len(urls)} calendars with {workers} drivers[/]")
+
+    # Only scrape each calendar once, even if it is listed under several URLs
+    jobs = []
+    seen_ids = set()
+    results = []
+    for url in urls:
+        try:
+            calendar_id = scraper.extract_calendar_id(url)
+        except Exception as e:
+            results.append({'url': url, 'calendar_id': None, 'status': 'failed', 'error': str(e),
+                            'events': 0, 'seconds': 0.0, 'path': None})
+            continue
+        if calendar_id in seen_ids:
+            logger.debug(f"Skipping duplicate calendar {calendar_id}")
+            continue
+        seen_ids.add(calendar_id)
+        jobs.append((url, calendar_id))
+
+    pool = DriverPool(workers)
+
+    def run_job(url, calendar_id, progress):
+        result = {'url': url, 'calendar_id': calendar_id, 'status': 'skipped', 'error': None,
+                  'events': 0, 'seconds': 0.0, 'path': None}
+        if not scraper.running:
+            return result
+
+        start = time.monotonic()
+        drivers = []
+        healthy = True
+
+        def get_driver(restart=False):
+            # A restart hands the dead driver back to the pool to be replaced
+            if restart and drivers:
+                pool.release(drivers.pop(), healthy=False)
+            drivers.append(pool.acquire())
+            return drivers[-1]
+
+        try:
+            json_path, event_count, run_dir = scrape_calendar(
+                get_driver, url, calendar_id, progress, max_empty_months, target_months, resume, fresh_months,
+                source
+            )
+            result.update(status='ok' if scraper.running else 'partial', events=event_count, path=json_path)
+        except Exception as e:
+            # The driver may be in a bad state, start a fresh one for the next calendar
+            healthy = False
+            logger.error(f"Error scraping {calendar_id}: {str(e)}")
+            logger.debug(f"Traceback: {traceback.format_exc()}")
+            result.update(status='failed', error=str(e))
+            metrics.increment('failed_calendars')
+        finally:
+            for driver in drivers:
+                pool.release(driver, healthy)
+            result['seconds'] = time.monotonic() - start
+        return result
+
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            BarColumn(),
+            TaskProgressColumn(),
+            console=scraper.console
+        ) as progress:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(run_job, url, calendar_id, progress) for url, calendar_id in jobs]
+                results.extend(future.result() for future in futures)
+    finally:
+        pool.close()
+
+    report_path = write_batch_report(results)
+    if prometheus_path:
+        metrics.write_prometheus(prometheus_path)
+    print_batch_report(results, report_path)
+    return results
@@ -0,0 +1,391 @@
+import argparse
+import calendar
+import contextlib
+import html
+import io
+import json
+import logging
+import math
+import os
+import platform
+import re
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+from src.event_parser import parse_event_label
+from src.journal import EventJournal, compact_journal
+from src.manifest import record_run
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+MONTH_FIXTURE = os.path.join(FIXTURES_DIR, 'month_view.html')
+FIXTURE_MONTH = date(2024, 3, 1)  # Month the fixture page was recorded in
+
+BENCH_CALENDAR_ID = 'bench@calspy.local'
+DEFAULT_SIZES = (1000, 100000)
+BENCHMARKS = ('parse_labels', 'parse_month_events', 'save_progress', 'load_calendar_data', 'generate_calendar')
+
+CHIP_PATTERN = re.compile(
+    r'<div class="KF4T6b" role="button"[^>]*><span class="XuJrye">(?P<label>.*?)</span>'
+    r'(?:<span class="WBi6vc"[^>]*>(?P<details>.*?)</span>)?</div>\s*'
+)
+
+def load_month_fixture(path=None):
+    """
+    Returns the recorded month view HTML
+    """
+    with open(path or MONTH_FIXTURE, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def fixture_labels(page):
+    """
+    Returns the (label, details) pairs of every event chip in a month page, like EXTRACT_EVENTS_SCRIPT does
+    """
+    return [(html.unescape(match.group('label')), html.unescape(match.group('details') or ''))
+            for match in CHIP_PATTERN.finditer(page)]
+
+def month_page(page, month_date, with_events=True):
+    """
+    Rewrites the recorded page to show the month containing month_date.
+    Days that do not exist in that month are dropped, with_events=False gives an empty month.
+    """
+    name = calendar.month_name[month_date.month]
+    year = f"{month_date.year:04d}"
+    last_day = calendar.monthrange(month_date.year, month_date.month)[1]
+    fixture_name = calendar.month_name[FIXTURE_MONTH.month]
+
+    def chip(match):
+        if not with_events:
+            return ''
+        day = re.search(fixture_name + r' (\d{1,2}), ' + str(FIXTURE_MONTH.year), match.group(0))
+        if day and int(day.group(1)) > last_day:
+            return ''
+        return match.group(0)
+
+    page = CHIP_PATTERN.sub(chip, page)
+    page = re.sub(fixture_name + r' (\d{1,2}), ' + str(FIXTURE_MONTH.year),
+                  lambda match: f"{name} {match.group(1)}, {year}", page)
+    page = page.replace(f"{fixture_name} {FIXTURE_MONTH.year}", f"{name} {year}")
+    return page.replace(FIXTURE_MONTH.strftime('%Y-%m-'), f"{year}-{month_date.month:02d}-")
+
+def shift_months(month_date, months):
+    total = month_date.year * 12 + (month_date.month - 1) - months
+    return date(total // 12, total % 12 + 1, 1)
+
+def synthetic_events(count, page):
+    """
+    Returns `count` distinct stored events built from the fixture's events, repeated month by month
+    backwards from the fixture month
+    """
+    base = [event for event in (parse_event_label(label, details) for label, details in fixture_labels(page))
+            if event and event.get('start')]
+    events = []
+    offset = 0
+    while len(events) < count:
+        month_date = shift_months(FIXTURE_MONTH, offset)
+        last_day = calendar.monthrange(month_date.year, month_date.month)[1]
+        name = calendar.month_name[month_date.month]
+        for event in base:
+            start_day = date.fromisoformat(event['start'][:10])
+            if start_day.day > last_day:
+                continue
+            start = month_date.replace(day=start_day.day)
+            shifted = dict(event)
+            shifted['start'] = start.isoformat() + event['start'][10:]
+            if event['end']:
+                end = start + (date.fromisoformat(event['end'][:10]) - start_day)
+                shifted['end'] = end.isoformat() + event['end'][10:]
+            when = event['datetime'].split(f", {FIXTURE_MONTH.year} ", 1)[1]
+            shifted['datetime'] = f"{name} {start.day}, {start.year:04d} {when}"
+            events.append(shifted)
+            if len(events) == count:
+                break
+        offset += 1
+    return events
+
+def best_time(function, repeat):
+    """
+    Runs function `repeat` times and returns the fastest run in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def load_scraper():
+    """
+    Imports the scraper module, which needs selenium and the other scraping dependencies
+    """
+    from src import scraper
+    return scraper
+
+def prepare_calendar(events):
+    """
+    Writes a journaled, compacted run of the bench calendar, as a finished scrape would leave it.
+    Returns the run directory.
+    """
+    run_dir = os.path.join(os.getcwd(), 'calendars', BENCH_CALENDAR_ID, time.strftime('%Y%m%d_%H%M%S'))
+    os.makedirs(run_dir, exist_ok=True)
+    record_run(run_dir, BENCH_CALENDAR_ID)
+    journal = EventJournal(BENCH_CALENDAR_ID, run_dir)
+    by_month = {}
+    for event in events:
+        by_month.setdefault(event['start'][:7], []).append(event)
+    for month in sorted(by_month, reverse=True):
+        journal.append_month(month, month, by_month[month])
+    journal.close()
+    compact_journal(run_dir, BENCH_CALENDAR_ID, final=True)
+    return run_dir
+
+def bench_parse_labels(page, size, repeat, context):
+    labels = fixture_labels(page)
+    labels = (labels * math.ceil(size / len(labels)))[:size]
+    return best_time(lambda: [parse_event_label(label, details) for label, details in labels], repeat)
+
+def bench_parse_month_events(page, size, repeat, context):
+    """
+    Parses whole month pages the way the page_source fallback does, enough pages to reach `size` events
+    """
+    from bs4 import BeautifulSoup
+    scraper = load_scraper()
+    pages = math.ceil(size / len(fixture_labels(page)))
+
+    def run():
+        for _ in range(pages):
+            scraper.parse_month_events(BeautifulSoup(page, 'html.parser'))
+
+    return best_time(run, repeat)
+
+def bench_save_progress(page, size, repeat, context):
+    """
+    Saves the final snapshot of a run through save_progress, which compacts the run's journal
+    """
+    scraper = load_scraper()
+    scraper.current_calendar_id = BENCH_CALENDAR_ID
+    scraper.current_journal = EventJournal(BENCH_CALENDAR_ID, context['run_dir'])
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return best_time(lambda: scraper.save_progress(context['events'], BENCH_CALENDAR_ID, final=True),
+                             repeat)
+    finally:
+        scraper.current_journal.close()
+        scraper.current_journal = None
+
+def bench_load_calendar_data(page, size, repeat, context):
+    from src.generate_calendar import load_calendar_data
+    return best_time(lambda: load_calendar_data(BENCH_CALENDAR_ID), repeat)
+
+def bench_generate_calendar(page, size, repeat, context):
+    from src.generate_calendar import generate_calendar
+
+    def run():
+        # generate_calendar reports errors by returning False
+        if not generate_calendar(BENCH_CALENDAR_ID):
+            raise RuntimeError("generate_calendar failed")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        return best_time(run, repeat)
+
+def git_revision():
+    """
+    Returns (short commit hash, dirty) of the working tree, or (None, None) outside a git checkout
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        return commit, bool(status)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=3, only=None, fixture=None):
+    """
+    Runs every benchmark at every size in a temporary working directory.
+    Returns the results dict that is written to the results file.
+    Benchmarks whose dependencies are not installed are reported as skipped.
+    """
+    page = load_month_fixture(fixture)
+    commit, dirty = git_revision()
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'sizes': list(sizes),
+        'results': {}
+    }
+    selected = [name for name in BENCHMARKS if not only or name in only]
+    original_dir = os.getcwd()
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix='calspy-bench-') as workdir:
+            os.chdir(workdir)
+            try:
+                context = {}
+                if set(selected) - {'parse_labels', 'parse_month_events'}:
+                    context['events'] = synthetic_events(size, page)
+                    context['run_dir'] = prepare_calendar(context['events'])
+                for name in selected:
+                    function = globals()[f'bench_{name}']
+                    try:
+                        seconds = function(page, size, repeat, context)
+                        result = {'seconds': seconds, 'events_per_second': size / seconds if seconds else None}
+                    except ImportError as e:
+                        result = {'skipped': f"missing dependency: {e.name or e}"}
+                    results['results'].setdefault(name, {})[str(size)] = result
+                    print_result(name, size, result)
+            finally:
+                os.chdir(original_dir)
+
+    return results
+
+def print_result(name, size, result, baseline=None):
+    if 'skipped' in result:
+        print(f"{name:<20} {size:>9,} events  skipped ({result['skipped']})")
+        return
+    line = f"{name:<20} {size:>9,} events  {result['seconds']:9.3f}s  {result['events_per_second']:>12,.0f} events/s"
+    if baseline and baseline.get('seconds'):
+        line += f"  {baseline['seconds'] / result['seconds']:5.2f}x vs baseline"
+    print(line)
+
+def compare(results, baseline):
+    """
+    Prints every result next to the same benchmark and size from a baseline results file
+    """
+    print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('timestamp')}), higher is faster:")
+    for name, by_size in results['results'].items():
+        for size, result in by_size.items():
+            print_result(name, int(size), result, baseline.get('results', {}).get(name, {}).get(size))
+
+class MonthPageHandler(BaseHTTPRequestHandler):
+    """
+    Serves the recorded month page for whatever month the dates= parameter asks for, so the scraper
+    can walk it like the real embed. The Previous button navigates to the month before.
+    Months more than `months_with_events` before the current one are served empty.
+    """
+
+    page = None
+    months_with_events = 24
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        today = date.today().replace(day=1)
+        month_date = today
+        if 'dates' in query:
+            month_date = datetime.strptime(query['dates'][0][:6], '%Y%m').date()
+
+        previous = shift_months(month_date, 1).strftime('%Y%m01')
+        query['dates'] = [f"{previous}/{previous}"]
+        previous_url = f"{parsed.path}?{urlencode(query, doseq=True)}"
+        age = (today.year - month_date.year) * 12 + today.month - month_date.month
+
+        body = month_page(self.page, month_date, with_events=age < self.months_with_events)
+        body = body.replace('<button aria-label="Previous month" class="prev">',
+                            f'<button aria-label="Previous month" class="prev" '
+                            f'onclick="location.href={html.escape(json.dumps(previous_url))}">')
+        data = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logging.getLogger('scraper').debug(f"Fixture server: {format % args}")
+
+def serve(port=0, months_with_events=24, fixture=None):
+    """
+    Starts the stand-in calendar server in a background thread.
+    Returns (server, calendar URL), call server.shutdown() to stop it.
+    """
+    handler = type('Handler', (MonthPageHandler,), {'page': load_month_fixture(fixture),
+                                                    'months_with_events': months_with_events})
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/calendar/embed?" + urlencode({'src': BENCH_CALENDAR_ID})
+    return server, url
+
+def bench_end_to_end(months_with_events=24, fixture=None):
+    """
+    Runs fetch_calendar_data in the browser against the stand-in server, from driver startup to the final save.
+    Needs Chrome. Returns (seconds, event count).
+    """
+    scraper = load_scraper()
+    server, url = serve(months_with_events=months_with_events, fixture=fixture)
+    original_dir = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory(prefix='calspy-bench-') as workdir:
+            os.chdir(workdir)
+            try:
+                scraper.current_calendar_id = BENCH_CALENDAR_ID
+                scraper.current_journal = None
+                start = time.perf_counter()
+                events = scraper.fetch_calendar_data(url, resume=False, source='browser')
+                return time.perf_counter() - start, len(events)
+            finally:
+                os.chdir(original_dir)
+    finally:
+        server.shutdown()
+
+def main(argv=None):
+    """
+    Command line entry point, argv defaults to sys.argv[1:]
+    """
+    parser = argparse.ArgumentParser(description='Benchmark calspy hot paths offline against recorded calendar pages')
+    parser.add_argument('-sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='Comma separated event counts, e.g. 1000,100000,1000000')
+    parser.add_argument('-repeat', type=int, default=3, help='Runs per benchmark, the fastest one is reported')
+    parser.add_argument('-only', help=f"Comma separated benchmarks to run ({', '.join(BENCHMARKS)})")
+    parser.add_argument('-fixture', help='Month page HTML to benchmark with instead of src/fixtures/month_view.html')
+    parser.add_argument('-output', metavar='FILE', help='Write the results to FILE as JSON')
+    parser.add_argument('-compare', metavar='FILE', help='Compare with a results file written by an earlier run')
+    parser.add_argument('-e2e', action='store_true', help='Also scrape the stand-in server end to end in Chrome')
+    parser.add_argument('-serve', action='store_true', help='Only run the stand-in calendar server until interrupted')
+    parser.add_argument('-port', type=int, default=8765, help='Port for -serve')
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        server, url = serve(args.port, fixture=args.fixture)
+        print(f"Serving recorded calendar pages at {url}")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    only = set(args.only.split(',')) if args.only else None
+    results = run_benchmarks(sizes, args.repeat, only, args.fixture)
+
+    if args.e2e:
+        try:
+            seconds, event_count = bench_end_to_end(fixture=args.fixture)
+            results['results']['end_to_end'] = {str(event_count): {'seconds': seconds,
+                                                                   'events_per_second': event_count / seconds}}
+            print_result('end_to_end', event_count, results['results']['end_to_end'][str(event_count)])
+        except ImportError as e:
+            print(f"end_to_end skipped (missing dependency: {e.name or e})")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(results, json.load(f))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+import logging
+import os
+import socket
+import threading
+import weakref
+
+logger = logging.getLogger('scraper')
+
+# Browser settings, overridden from the command line with configure_browser
+settings = {
+    'backend': 'uc',           # 'uc' for undetected_chromedriver, 'chrome' for plain Selenium Chrome (lighter)
+    'block_resources': True,   # Block images, fonts, media and analytics through the DevTools protocol
+    'profile_dir': None,       # Directory for persistent Chrome profiles and caches, None for a fresh one each time
+}
+
+# Requests the scraper never needs. The calendar grid and event chips only need the page, scripts and styles.
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*.mp4', '*.webm', '*.mp3',
+    '*fonts.googleapis.com*', '*fonts.gstatic.com*',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*play.google.com/log*', '*/gen_204*',
+]
+
+# Flags that cut memory and background work per driver
+LIGHT_ARGUMENTS = [
+    '--blink-settings=imagesEnabled=false',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--mute-audio',
+    '--no-first-run',
+    '--renderer-process-limit=2',
+]
+
+# Files Chrome keeps in a profile it has open, SingletonLock links to "<hostname>-<pid>" of the owner
+SINGLETON_FILES = ('SingletonLock', 'SingletonSocket', 'SingletonCookie')
+
+# Profile slots held by drivers of this process, released again by quit_driver
+_claimed_slots = set()
+_profile_lock = threading.Lock()
+# Driver: finalizer releasing its profile slot, which also runs if the driver is dropped without quitting
+_profile_releases = weakref.WeakKeyDictionary()
+
+def configure_browser(backend=None, block_resources=None, profile_dir=None):
+    """
+    Overrides the default browser settings
+    """
+    if backend is not None:
+        settings['backend'] = backend
+    if block_resources is not None:
+        settings['block_resources'] = block_resources
+    if profile_dir is not None:
+        settings['profile_dir'] = profile_dir
+
+def stale_profile_lock(path):
+    """
+    Returns True if the profile's SingletonLock belongs to a Chrome process on this machine that no longer runs
+    """
+    try:
+        owner = os.readlink(os.path.join(path, 'SingletonLock'))
+    except OSError:
+        return False
+    hostname, _, pid = owner.rpartition('-')
+    if hostname != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+def claim_profile_dir(base_dir):
+    """
+    Returns a profile directory under base_dir that no running Chrome is using, and the slot number it holds.
+    Profiles are numbered and the lowest free one is taken, so the same directories (and their caches)
+    are reused from run to run and after driver restarts, one per concurrent driver.
+    Locks left behind by a Chrome that crashed are removed.
+    """
+    with _profile_lock:
+        slot = 0
+        while True:
+            path = os.path.join(base_dir, f'driver-{slot}')
+            if slot not in _claimed_slots:
+                # Chrome holds SingletonLock in a profile it has open, possibly from another calspy process
+                if os.path.lexists(os.path.join(path, 'SingletonLock')) and stale_profile_lock(path):
+                    logger.debug(f"Removing stale Chrome lock from {path}")
+                    for name in SINGLETON_FILES:
+                        try:
+                            os.remove(os.path.join(path, name))
+                        except FileNotFoundError:
+                            pass
+                if not os.path.lexists(os.path.join(path, 'SingletonLock')):
+                    os.makedirs(path, exist_ok=True)
+                    _claimed_slots.add(slot)
+                    return path, slot
+            slot += 1
+
+def release_profile_dir(slot):
+    """
+    Makes a profile slot claimed by claim_profile_dir available again
+    """
+    with _profile_lock:
+        _claimed_slots.discard(slot)
+
+def quit_driver(driver):
+    """
+    Quits a driver from create_driver and releases its profile slot, even if quitting fails
+    """
+    try:
+        driver.quit()
+    finally:
+        release = _profile_releases.pop(driver, None)
+        if release:
+            release()
+
+def chrome_arguments(profile_path=None):
+    """
+    Returns the Chrome command line arguments for the current settings
+    """
+    arguments = ['--headless', '--disable-gpu', '--no-sandbox', '--disable-dev-shm-usage']
+    if settings['block_resources']:
+        arguments.extend(LIGHT_ARGUMENTS)
+    if profile_path:
+        arguments.append(f'--disk-cache-dir={os.path.join(profile_path, "cache")}')
+    return arguments
+
+def block_resources(driver):
+    """
+    Blocks requests matching BLOCKED_URL_PATTERNS for the driver's page
+    """
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        logger.warning(f"Could not enable resource blocking: {str(e)}")
+
+def create_driver():
+    """
+    Starts a headless Chrome driver with the configured backend, profile and resource blocking
+    """
+    profile_path, slot = claim_profile_dir(settings['profile_dir']) if settings['profile_dir'] else (None, None)
+    arguments = chrome_arguments(profile_path)
+    preferences = {'profile.managed_default_content_settings.images': 2} if settings['block_resources'] else None
+    logger.debug(f"Starting {settings['backend']} Chrome driver with profile {profile_path or '(temporary)'}")
+
+    try:
+        driver = start_driver(arguments, preferences, profile_path)
+    except Exception:
+        if slot is not None:
+            release_profile_dir(slot)
+        raise
+    if slot is not None:
+        _profile_releases[driver] = weakref.finalize(driver, release_profile_dir, slot)
+
+    if settings['block_resources']:
+        block_resources(driver)
+    return driver
+
+def start_driver(arguments, preferences, profile_path):
+    """
+    Starts Chrome with the configured backend
+    """
+    if settings['backend'] == 'chrome':
+        from selenium import webdriver
+        options = webdriver.ChromeOptions()
+        for argument in arguments:
+            options.add_argument(argument)
+        if profile_path:
+            options.add_argument(f'--user-data-dir={profile_path}')
+        if preferences:
+            options.add_experimental_option('prefs', preferences)
+        driver = webdriver.Chrome(options=options)
+    else:
+        import undetected_chromedriver as uc
+        options = uc.ChromeOptions()
+        for argument in arguments:
+            options.add_argument(argument)
+        if preferences:
+            options.add_experimental_option('prefs', preferences)
+        driver = uc.Chrome(options=options, user_data_dir=profile_path)
+    return driver
@@ -0,0 +1,54 @@
+import hashlib
+import threading
+
+def event_key(event):
+    """
+    Returns a stable hash identifying an event by its start, end, summary and location.
+    Events saved before start and end were stored are identified by their datetime text instead.
+    """
+    when = event.get('start') or event.get('datetime') or ''
+    identity = '\x1f'.join((when, event.get('end') or '', event.get('summary', ''), event.get('location', '')))
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+class EventIndex:
+    """
+    Hash index of events that have already been stored.
+    Month views include leading and trailing days of the adjacent months, so the same
+    event is usually seen twice while walking through a calendar.
+    Events without a start field are always kept: snapshots written before start was stored only hold the
+    year and time in their datetime text, so every occurrence of a recurring event would look the same.
+    """
+
+    def __init__(self, events=None):
+        self._keys = set()
+        self._lock = threading.Lock()
+        if events:
+            self.add(events)
+
+    def add(self, events):
+        """
+        Adds events to the index and returns the ones that were not seen before, in order
+        """
+        new_events = []
+        with self._lock:
+            for event in events:
+                if 'start' not in event:
+                    new_events.append(event)
+                    continue
+                key = event_key(event)
+                if key not in self._keys:
+                    self._keys.add(key)
+                    new_events.append(event)
+        return new_events
+
+    def __contains__(self, event):
+        return 'start' in event and event_key(event) in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+def dedupe_events(events):
+    """
+    Returns events with duplicates removed, keeping the first occurrence of each
+    """
+    return EventIndex().add(events)
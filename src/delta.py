@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import time
+from src.dedup import event_key
+
+DELTA_FILENAME = 'calendar_delta.json'
+
+def diff_month(old_events, new_events):
+    """
+    Compares two captures of the same month.
+    Events whose key disappeared but whose datetime and summary still exist are reported as changed.
+    Returns {'added': [...], 'removed': [...], 'changed': [{'before', 'after'}]}
+    """
+    old_by_key = {event_key(event): event for event in old_events}
+    new_by_key = {event_key(event): event for event in new_events}
+
+    removed = [event for key, event in old_by_key.items() if key not in new_by_key]
+    added = [event for key, event in new_by_key.items() if key not in old_by_key]
+
+    # Pair up removed/added events that only differ in location
+    added_by_slot = {}
+    for event in added:
+        added_by_slot.setdefault((event.get('datetime'), event.get('summary')), []).append(event)
+
+    changed = []
+    still_removed = []
+    for event in removed:
+        candidates = added_by_slot.get((event.get('datetime'), event.get('summary')))
+        if candidates:
+            changed.append({'before': event, 'after': candidates.pop(0)})
+        else:
+            still_removed.append(event)
+
+    still_added = [event for events in added_by_slot.values() for event in events]
+    return {'added': still_added, 'removed': still_removed, 'changed': changed}
+
+class DeltaTracker:
+    """
+    Collects the differences between freshly scraped months and a previous capture
+    """
+
+    def __init__(self, calendar_id, previous_months, stop_after=None):
+        """
+        previous_months: {'YYYY-MM': month record} as returned by load_previous_months
+        stop_after: number of consecutive unchanged months after which scraping can stop
+        """
+        self.calendar_id = calendar_id
+        self.previous_months = previous_months
+        self.stop_after = stop_after
+        self.months = {}
+        self._lock = threading.Lock()
+
+    def record_month(self, month, events):
+        """
+        Compares a freshly scraped month with the previous capture.
+        Returns True if the month was captured before and nothing changed.
+        """
+        previous = self.previous_months.get(month)
+        diff = diff_month(previous['events'] if previous else [], events)
+        with self._lock:
+            self.months[month] = diff
+        return previous is not None and not any(diff.values())
+
+    def totals(self):
+        """
+        Returns the number of added, removed and changed events across all compared months
+        """
+        with self._lock:
+            diffs = list(self.months.values())
+        return {kind: sum(len(diff[kind]) for diff in diffs) for kind in ('added', 'removed', 'changed')}
+
+    def save(self, run_dir):
+        """
+        Writes the change feed to calendar_delta.json in run_dir and returns its path
+        """
+        with self._lock:
+            months = {month: diff for month, diff in sorted(self.months.items(), reverse=True) if any(diff.values())}
+            compared = len(self.months)
+
+        data = {
+            'calendar_id': self.calendar_id,
+            'delta_timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'months_compared': compared,
+            'totals': self.totals(),
+            'months': months
+        }
+
+        json_path = os.path.join(run_dir, DELTA_FILENAME)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return json_path
@@ -0,0 +1,420 @@
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from datetime import date, time as dt_time, timedelta
+
+logger = logging.getLogger('scraper')
+
+MONTHS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
+    'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12
+}
+
+MONTH_NAMES = tuple(name.capitalize() for name in MONTHS)
+
+_MONTH = r'(?:' + '|'.join(MONTH_NAMES) + r')'
+_WEEKDAY = r'(?:Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)'
+
+def _time(name):
+    """
+    Time regex capturing name, name_hour, name_minute and name_meridiem, e.g. '10am', '3:30 PM' or '14:00'
+    """
+    return (rf'(?P<{name}>(?P<{name}_hour>\d{{1,2}})(?::(?P<{name}_minute>\d{{2}}))?'
+            rf'(?:\s?(?P<{name}_meridiem>[ap])\.?m\.?)?)')
+
+def _date(name=''):
+    """
+    Date regex capturing the month, day and year of 'March 14, 2024' or '14 March 2024' style text,
+    as {name}month, {name}day, {name}year (month first) or {name}day2, {name}month2, {name}year2 (day first)
+    """
+    return (r'(?:' + _WEEKDAY + r',? )?'
+            rf'(?:(?P<{name}month>' + _MONTH + rf') (?P<{name}day>\d{{1,2}}), (?P<{name}year>\d{{4}})'
+            rf'|(?P<{name}day2>\d{{1,2}}) (?P<{name}month2>' + _MONTH + rf'),? (?P<{name}year2>\d{{4}}))')
+
+# Labels on event chips (span.XuJrye) look like
+#   "10am to 11am, Title, Calendar: Name, Location: Place, March 14, 2024"
+#   "All day, Title, March 14, 2024"
+#   "March 14, 2024 to March 16, 2024, Title, Location: Place"
+#   "March 14, 2024 at 10pm to March 15, 2024 at 2am, Title"
+# LABEL_PATTERN matches the time part up to the title, the date at the end is matched by DATE_PATTERN.
+# Every date and time is captured down to its numbers, so nothing is parsed a second time.
+LABEL_PATTERN = re.compile(
+    r'(?:'
+    + _time('start_time') + r'(?:\s?(?:to|–|-)\s?' + _time('end_time') + r')?'
+    r'|(?P<all_day>All day)'
+    r'|(?P<span_start_date>' + _date('span_start_') + r') at ' + _time('span_start_time') + r' to '
+    r'(?P<span_end_date>' + _date('span_end_') + r') at ' + _time('span_end_time')
+    + r'|(?P<range_start_date>' + _date('range_start_') + r') to (?P<range_end_date>' + _date('range_end_') + r')'
+    r'), ',
+    re.IGNORECASE
+)
+
+DATE_PATTERN = re.compile(_date(), re.IGNORECASE)
+
+ParsedLabel = namedtuple('ParsedLabel', [
+    'when',        # Time part of the label as shown, e.g. '10am to 11am' or 'All day'
+    'start_time',  # '10am', None for all-day events
+    'end_time',    # '11am', None if the label has no end time
+    'all_day',     # True for all-day and multi-day date range events
+    'date',        # Date text as shown, e.g. 'March 14, 2024'
+    'start_date',  # datetime.date, None if the date could not be read
+    'end_date',    # datetime.date for events spanning several days, otherwise None
+    'title',
+    'location',
+    'calendar',
+    'extras',      # Remaining label parts (organizer, response status, ...), in order
+    'start',       # ISO start, see event_span
+    'end',         # ISO end, see event_span
+])
+
+TIME_PATTERN = re.compile(_time('time'), re.IGNORECASE)
+
+DATETIME_TEXT_PATTERN = re.compile(r'^(?P<date>' + _date() + r') (?P<when>.+)$', re.IGNORECASE)
+
+def clock(hour, minute, meridiem):
+    """
+    Returns a datetime.time from captured hour, minute and meridiem ('a', 'p' or None) text, or None
+    """
+    hour = int(hour)
+    if meridiem:
+        meridiem = meridiem.lower()
+        if meridiem == 'p' and hour < 12:
+            hour += 12
+        elif meridiem == 'a' and hour == 12:
+            hour = 0
+    try:
+        return dt_time(hour, int(minute) if minute else 0)
+    except ValueError:
+        return None
+
+def matched_date(match, name=''):
+    """
+    Returns the datetime.date captured by a _date(name) group of a match, or None
+    """
+    month = match.group(name + 'month')
+    if month:
+        day, year = match.group(name + 'day'), match.group(name + 'year')
+    else:
+        month, day, year = match.group(name + 'month2'), match.group(name + 'day2'), match.group(name + 'year2')
+    try:
+        return date(int(year), MONTHS[month.lower()], int(day))
+    except ValueError:
+        return None
+
+def matched_time(match, name):
+    """
+    Returns the datetime.time captured by a _time(name) group of a match, or None
+    """
+    return clock(match.group(name + '_hour'), match.group(name + '_minute'), match.group(name + '_meridiem'))
+
+def parse_time(text):
+    """
+    Returns a datetime.time for '10am', '3:30 PM' or '14:00' style text, or None
+    """
+    if not text:
+        return None
+    match = TIME_PATTERN.fullmatch(text.strip())
+    return matched_time(match, 'time') if match else None
+
+def parse_date(text):
+    """
+    Returns a datetime.date for 'March 14, 2024' style text, or None
+    """
+    if not text:
+        return None
+    match = DATE_PATTERN.fullmatch(text.strip())
+    return matched_date(match) if match else None
+
+def event_span(start_day, end_day, all_day, start_clock, end_clock):
+    """
+    Returns (start, end) ISO strings from (date, ISO text) days and (time, ISO text) clocks, see iso_pair.
+    Timed events give 'YYYY-MM-DDTHH:MM:SS', all-day events give 'YYYY-MM-DD' with an inclusive end date.
+    Either value is None if it cannot be determined.
+    """
+    if start_day is None:
+        return None, None
+    if all_day:
+        return start_day[1], (end_day or start_day)[1]
+    if start_clock is None:
+        return None, None
+    start = f"{start_day[1]}T{start_clock[1]}"
+    if end_clock is None:
+        return start, None
+    end_day = end_day or start_day
+    if (end_day[0], end_clock[0]) < (start_day[0], start_clock[0]):  # Runs past midnight
+        end_day = iso_pair(end_day[0] + timedelta(days=1))
+    return start, f"{end_day[1]}T{end_clock[1]}"
+
+def iso_pair(value):
+    """
+    Returns (value, value.isoformat()) for a date or time, or None
+    """
+    return (value, value.isoformat()) if value is not None else None
+
+def parse_datetime_text(text):
+    """
+    Returns (start, end, all_day) for a stored 'March 14, 2024 10am to 11am' datetime string.
+    Used for snapshots written before events carried their own start and end.
+    """
+    match = DATETIME_TEXT_PATTERN.match(text or '')
+    if not match:
+        return None, None, False
+    when = match.group('when')
+    all_day = when.lower() == 'all day'
+    start_time, _, end_time = when.partition(' to ')
+    start, end = event_span(iso_pair(matched_date(match)), None, all_day,
+                            None if all_day else iso_pair(parse_time(start_time)), iso_pair(parse_time(end_time)))
+    return start, end, all_day
+
+WEEKDAY_NAMES = frozenset(('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'))
+
+def split_date(text, pos):
+    """
+    Finds the date at the end of a label, which can itself contain up to two ', ' separators
+    ('March 14, 2024', 'Thursday, March 14, 2024', '14 March 2024').
+    Returns (index the date's ', ' starts at, DATE_PATTERN match), or (len(text), None) if there is none.
+    """
+    if not text[-4:].isdigit():
+        return len(text), None
+    cut = text.rfind(', ', pos)
+    if cut == -1:
+        return len(text), None
+    before = text.rfind(', ', pos, cut)
+    # Month first dates have a ', ' before the year, day first dates do not
+    for cut in (before, cut) if before != -1 else (cut,):
+        match = DATE_PATTERN.fullmatch(text, cut + 2)
+        if match:
+            # A weekday in front of the date ('Thursday, March 14, 2024') belongs to it, every weekday ends in 'y'
+            if text[cut - 1] in 'yY':
+                weekday_cut = text.rfind(', ', pos, cut)
+                if weekday_cut != -1 and text[weekday_cut + 2:cut].lower() in WEEKDAY_NAMES:
+                    return weekday_cut, DATE_PATTERN.fullmatch(text, weekday_cut + 2)
+            return cut, match
+    return len(text), None
+
+# (value, ISO text) of dates and times already converted, labels of one calendar repeat the same few dozen
+_dates = {}
+_clocks = {}
+CACHE_LIMIT = 4096
+
+def cached_date(text, match, name=''):
+    """
+    Returns iso_pair(matched_date(match, name)) for date text, remembering it by text
+    """
+    value = _dates.get(text)
+    if value is None:
+        if len(_dates) >= CACHE_LIMIT:
+            _dates.clear()
+        value = _dates[text] = iso_pair(matched_date(match, name))
+    return value
+
+def cached_time(text, match, name):
+    """
+    Returns iso_pair(matched_time(match, name)) for time text, remembering it by text
+    """
+    value = _clocks.get(text)
+    if value is None:
+        if len(_clocks) >= CACHE_LIMIT:
+            _clocks.clear()
+        value = _clocks[text] = iso_pair(matched_time(match, name))
+    return value
+
+def parse_label(text):
+    """
+    Parses an event chip label into a ParsedLabel in one pass.
+    Returns None if the label does not match the expected format.
+    """
+    match = LABEL_PATTERN.match(text)
+    if not match:
+        return None
+
+    body_start = match.end()
+    body_end, date_match = split_date(text, body_start)
+    location = ''
+
+    # The location comes last and can contain commas of its own (street addresses)
+    location_index = text.find(', Location: ', body_start, body_end)
+    if location_index != -1:
+        location = text[location_index + 12:body_end].strip()
+        body_end = location_index
+
+    body = text[body_start:body_end].split(', ')
+    title = body[0].strip()
+    calendar = ''
+    extras = []
+    for part in body[1:]:
+        if part.startswith('Calendar: '):
+            calendar = part[10:].strip()
+        elif part and part != title:
+            extras.append(part)
+
+    end_day = start_day = start_clock = end_clock = None
+    date_text = ''
+    if date_match:
+        date_text = date_match.group()
+        start_day = _dates.get(date_text) or cached_date(date_text, date_match)
+    start_time, end_time, all_day_text = match.group('start_time', 'end_time', 'all_day')
+    if start_time:
+        all_day = False
+        when = f"{start_time} to {end_time}" if end_time else start_time
+        # Cache hits are looked up inline, they are the common case and a call costs as much as the lookup
+        start_clock = _clocks.get(start_time) or cached_time(start_time, match, 'start_time')
+        if end_time:
+            end_clock = _clocks.get(end_time) or cached_time(end_time, match, 'end_time')
+    elif all_day_text:
+        all_day = True
+        when = all_day_text
+    elif match.group('span_start_date'):
+        all_day = False
+        start_time, end_time = match.group('span_start_time', 'span_end_time')
+        when = f"{start_time} to {end_time}"
+        start_clock = cached_time(start_time, match, 'span_start_time')
+        end_clock = cached_time(end_time, match, 'span_end_time')
+        if not date_match:
+            date_text = match.group('span_start_date')
+            start_day = cached_date(date_text, match, 'span_start_')
+        end_day = cached_date(match.group('span_end_date'), match, 'span_end_')
+    else:
+        all_day = True
+        when = 'All day'
+        if not date_match:
+            date_text = match.group('range_start_date')
+            start_day = cached_date(date_text, match, 'range_start_')
+        end_day = cached_date(match.group('range_end_date'), match, 'range_end_')
+
+    start, end = event_span(start_day, end_day, all_day, start_clock, end_clock)
+    return ParsedLabel(when, start_time, end_time, all_day, date_text, start_day and start_day[0],
+                       end_day and end_day[0], title, location, calendar, extras, start, end)
+
+def label_to_event(parsed, details_text='', timezone=None):
+    """
+    Builds an event dict in the stored shape from a ParsedLabel
+    timezone: name of the time zone the calendar was displayed in, if known
+    """
+    description = details_text
+    if parsed.extras:
+        parts = [details_text] if details_text else []
+        seen = set(parts)
+        for part in parsed.extras:
+            if part not in seen:
+                seen.add(part)
+                parts.append(part)
+        description = ' | '.join(parts)
+
+    return {
+        'datetime': f"{parsed.date} {parsed.when}" if parsed.date else parsed.when,
+        'summary': parsed.title,
+        'description': description,
+        'location': parsed.location,
+        'attendees': [],
+        'start': parsed.start,
+        'end': parsed.end,
+        'all_day': parsed.all_day,
+        'timezone': timezone,
+        'calendar': parsed.calendar
+    }
+
+def parse_legacy_label(text, details_text='', timezone=None):
+    """
+    Parses labels that do not match LABEL_PATTERN by splitting on ', ', like earlier versions did.
+    Start and end are read from the resulting datetime text where possible.
+    Returns None if the label has fewer than three parts.
+    """
+    parts = text.split(', ')
+    if len(parts) < 3:
+        return None
+
+    title = parts[1]
+    location = ''
+    calendar = ''
+    description = [details_text] if details_text else []
+    seen = set(description)
+    for part in parts:
+        if part.startswith('Location: '):
+            location = part[10:].strip()
+        elif part.startswith('Calendar: '):
+            calendar = part[10:].strip()
+        elif 'Calendar:' not in part and part != title and part not in seen:
+            if not any(month in part for month in MONTH_NAMES):
+                seen.add(part)
+                description.append(part)
+
+    datetime_text = f"{parts[-1]} {parts[0]}"
+    start, end, all_day = parse_datetime_text(datetime_text)
+    return {
+        'datetime': datetime_text,
+        'summary': title.strip(),
+        'description': ' | '.join(description),
+        'location': location,
+        'attendees': [],
+        'start': start,
+        'end': end,
+        'all_day': all_day,
+        'timezone': timezone,
+        'calendar': calendar
+    }
+
+def parse_event_label(text, details_text='', timezone=None):
+    """
+    Parses one event chip label into an event dict, or returns None if it cannot be read
+    """
+    parsed = parse_label(text)
+    if parsed is not None:
+        return label_to_event(parsed, details_text, timezone)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Label did not match the expected format, splitting it instead: %s", text)
+    return parse_legacy_label(text, details_text, timezone)
+
+def load_fixtures(path=None):
+    """
+    Loads the label fixture corpus, a JSON list of {'label', 'details', 'expected'} entries
+    """
+    path = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'event_labels.json')
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def check_fixtures(fixtures):
+    """
+    Parses every fixture label and returns a list of (label, expected, actual) mismatches
+    """
+    mismatches = []
+    for fixture in fixtures:
+        parsed = parse_label(fixture['label'])
+        actual = parsed._asdict() if parsed else None
+        if actual:
+            actual['start_date'] = actual['start_date'].isoformat() if actual['start_date'] else None
+            actual['end_date'] = actual['end_date'].isoformat() if actual['end_date'] else None
+        expected = fixture['expected']
+        if expected is None or actual is None:
+            if expected != actual:
+                mismatches.append((fixture['label'], expected, actual))
+            continue
+        differences = {key: actual.get(key) for key in expected if actual.get(key) != expected[key]}
+        if differences:
+            mismatches.append((fixture['label'], expected, differences))
+    return mismatches
+
+def measure_throughput(fixtures, repeat=2000):
+    """
+    Returns labels parsed per second over the fixture corpus
+    """
+    labels = [(fixture['label'], fixture.get('details', '')) for fixture in fixtures]
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for label, details in labels:
+            parse_event_label(label, details)
+    elapsed = time.perf_counter() - start
+    return len(labels) * repeat / elapsed
+
+if __name__ == "__main__":
+    fixtures = load_fixtures(sys.argv[1] if len(sys.argv) > 1 else None)
+    mismatches = check_fixtures(fixtures)
+    for label, expected, actual in mismatches:
+        print(f"MISMATCH: {label}\n  expected: {expected}\n  actual:   {actual}")
+    print(f"{len(fixtures) - len(mismatches)}/{len(fixtures)} labels parsed as expected")
+    print(f"{measure_throughput(fixtures):,.0f} labels/second")
+    sys.exit(1 if mismatches else 0)
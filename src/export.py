@@ -0,0 +1,295 @@
+import csv
+import json
+import os
+import struct
+import time
+import zlib
+from datetime import date, datetime, timedelta
+from src.dedup import EventIndex, event_key
+from src.event_parser import parse_datetime_text
+from src.ics import escape_text, fold_line
+from src.journal import JOURNAL_FILENAME, journal_months
+from src.manifest import latest_snapshot
+
+# Stored event fields, in the column order every format uses
+EVENT_FIELDS = ('datetime', 'summary', 'description', 'location', 'attendees', 'start', 'end', 'all_day',
+                'timezone', 'calendar')
+
+class NdjsonWriter:
+    """
+    Writes one compact JSON event per line
+    """
+
+    def __init__(self, path, calendar_id=None):
+        self.path = path
+        self.count = 0
+        self._file = open(path, 'w', encoding='utf-8')
+
+    def write(self, event):
+        self._file.write(json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+class CsvWriter:
+    """
+    Writes events as CSV with a header row, attendees are joined with '; '
+    """
+
+    def __init__(self, path, calendar_id=None):
+        self.path = path
+        self.count = 0
+        self._file = open(path, 'w', encoding='utf-8', newline='')
+        self._writer = csv.DictWriter(self._file, fieldnames=EVENT_FIELDS, extrasaction='ignore')
+        self._writer.writeheader()
+
+    def write(self, event):
+        row = dict(event)
+        row['attendees'] = '; '.join(event.get('attendees') or ())
+        self._writer.writerow(row)
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+class IcsWriter:
+    """
+    Writes events as an iCalendar file that calendar applications can import.
+    Events without a known start cannot be expressed in iCal and are left out (counted in skipped).
+    Times are written as local times in the event's time zone, or as floating times if it is unknown.
+    """
+
+    def __init__(self, path, calendar_id=None):
+        self.path = path
+        self.count = 0
+        self.skipped = 0
+        self._stamp = time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())
+        self._file = open(path, 'w', encoding='utf-8', newline='')
+        self._write_lines('BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//calspy//calspy export//EN',
+                          'CALSCALE:GREGORIAN')
+        if calendar_id:
+            self._write_lines(f'X-WR-CALNAME:{escape_text(calendar_id)}')
+
+    def _write_lines(self, *lines):
+        self._file.write(''.join(fold_line(line) + '\r\n' for line in lines))
+
+    def write(self, event):
+        start, end, all_day = event.get('start'), event.get('end'), event.get('all_day', False)
+        if start is None and 'all_day' not in event:
+            # Saved before events carried their own start and end
+            start, end, all_day = parse_datetime_text(event.get('datetime'))
+        if not start:
+            self.skipped += 1
+            return
+
+        lines = ['BEGIN:VEVENT', f"UID:{event_key(event)}@calspy", f"DTSTAMP:{self._stamp}"]
+        if all_day:
+            # Stored end dates are inclusive, DTEND of all-day events is exclusive
+            end_date = date.fromisoformat(end or start) + timedelta(days=1)
+            lines.append(f"DTSTART;VALUE=DATE:{date.fromisoformat(start).strftime('%Y%m%d')}")
+            lines.append(f"DTEND;VALUE=DATE:{end_date.strftime('%Y%m%d')}")
+        else:
+            tzid = f";TZID={event['timezone']}" if event.get('timezone') else ''
+            lines.append(f"DTSTART{tzid}:{datetime.fromisoformat(start).strftime('%Y%m%dT%H%M%S')}")
+            if end:
+                lines.append(f"DTEND{tzid}:{datetime.fromisoformat(end).strftime('%Y%m%dT%H%M%S')}")
+
+        lines.append(f"SUMMARY:{escape_text(event.get('summary') or '')}")
+        if event.get('location'):
+            lines.append(f"LOCATION:{escape_text(event['location'])}")
+        if event.get('description'):
+            lines.append(f"DESCRIPTION:{escape_text(event['description'])}")
+        for attendee in event.get('attendees') or ():
+            # Attendees are stored by name, Google's own exports use invalid:nomail for those without an address
+            address = f"mailto:{attendee}" if '@' in attendee else 'invalid:nomail'
+            lines.append(f'ATTENDEE;CN="{attendee.replace(chr(34), "")}":{address}')
+        lines.append('END:VEVENT')
+        self._write_lines(*lines)
+        self.count += 1
+
+    def close(self):
+        self._write_lines('END:VCALENDAR')
+        self._file.close()
+
+# Columnar files start and end with this marker
+COLUMNAR_MAGIC = b'CALCOL1\n'
+# Events per row group, each row group holds one compressed block per column
+ROW_GROUP_SIZE = 10000
+
+class ColumnarWriter:
+    """
+    Writes events in a compact columnar file, laid out like Parquet:
+
+        COLUMNAR_MAGIC
+        row group 1: one zlib-compressed JSON array per column, in EVENT_FIELDS order
+        row group 2: ...
+        footer: JSON {'version', 'calendar_id', 'columns',
+                      'row_groups': [{'rows', 'blocks': [[offset, size], ...]}]}
+        footer size (4 bytes, little endian)
+        COLUMNAR_MAGIC
+
+    Values of one column compress far better together than interleaved rows do, and readers can decode
+    only the columns they need. Only one row group is held in memory while writing. See read_columnar.
+    """
+
+    def __init__(self, path, calendar_id=None, row_group_size=ROW_GROUP_SIZE):
+        self.path = path
+        self.count = 0
+        self.calendar_id = calendar_id
+        self.row_group_size = row_group_size
+        self._columns = {field: [] for field in EVENT_FIELDS}
+        self._row_groups = []
+        self._file = open(path, 'wb')
+        self._file.write(COLUMNAR_MAGIC)
+
+    def write(self, event):
+        for field, values in self._columns.items():
+            values.append(event.get(field))
+        self.count += 1
+        if len(self._columns['datetime']) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        rows = len(self._columns['datetime'])
+        if not rows:
+            return
+        blocks = []
+        for values in self._columns.values():
+            data = zlib.compress(json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            blocks.append([self._file.tell(), len(data)])
+            self._file.write(data)
+            values.clear()
+        self._row_groups.append({'rows': rows, 'blocks': blocks})
+
+    def close(self):
+        self._flush()
+        footer = json.dumps({'version': 1, 'calendar_id': self.calendar_id, 'columns': list(EVENT_FIELDS),
+                             'row_groups': self._row_groups}).encode('utf-8')
+        self._file.write(footer)
+        self._file.write(struct.pack('<I', len(footer)))
+        self._file.write(COLUMNAR_MAGIC)
+        self._file.close()
+
+def read_columnar(path, columns=None):
+    """
+    Yields the events of a columnar file as dicts, one row group in memory at a time.
+    columns: only decode these fields (default all)
+    """
+    with open(path, 'rb') as f:
+        if f.read(len(COLUMNAR_MAGIC)) != COLUMNAR_MAGIC:
+            raise ValueError(f"Not a calspy columnar file: {path}")
+        f.seek(-(len(COLUMNAR_MAGIC) + 4), os.SEEK_END)
+        footer_size = struct.unpack('<I', f.read(4))[0]
+        f.seek(-(len(COLUMNAR_MAGIC) + 4 + footer_size), os.SEEK_END)
+        footer = json.loads(f.read(footer_size))
+
+        names = footer['columns']
+        wanted = [name for name in names if columns is None or name in columns]
+        for row_group in footer['row_groups']:
+            values = {}
+            for name, (offset, size) in zip(names, row_group['blocks']):
+                if name in wanted:
+                    f.seek(offset)
+                    values[name] = json.loads(zlib.decompress(f.read(size)))
+            for row in range(row_group['rows']):
+                yield {name: values[name][row] for name in wanted}
+
+# Format name: (file extension, writer class)
+EXPORT_FORMATS = {
+    'ndjson': ('.ndjson', NdjsonWriter),
+    'csv': ('.csv', CsvWriter),
+    'ics': ('.ics', IcsWriter),
+    'columnar': ('.calcol', ColumnarWriter),
+}
+
+def run_events(run_dir, use_partial=False):
+    """
+    Yields the events of a run without loading them all at once, newest month first.
+    Runs with a journal are streamed month by month, older runs are read from their snapshot file.
+    """
+    journal_path = os.path.join(run_dir, JOURNAL_FILENAME)
+    if os.path.exists(journal_path):
+        seen_events = EventIndex()
+        for _, events in journal_months(journal_path):
+            yield from seen_events.add(events)
+        return
+
+    for status in ('final', 'partial') if use_partial else ('final',):
+        snapshot_path = os.path.join(run_dir, f'calendar_data_{status}.json')
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'r', encoding='utf-8') as f:
+                yield from EventIndex().add(json.load(f).get('events', []))
+            return
+    raise FileNotFoundError(f"No calendar data found in {run_dir}")
+
+def snapshot_run_dir(calendar_id, use_partial=False):
+    """
+    Returns the run directory of the calendar's latest snapshot, whose journal or snapshot file is exported
+    """
+    snapshot_path = latest_snapshot(calendar_id, use_partial)
+    if not snapshot_path:
+        raise FileNotFoundError(f"No calendar data found for {calendar_id}")
+    return os.path.dirname(snapshot_path)
+
+def calendar_events(calendar_id, use_partial=False):
+    """
+    Yields the events of the calendar's latest snapshot, see run_events
+    """
+    return run_events(snapshot_run_dir(calendar_id, use_partial), use_partial)
+
+def export_events(events, formats, output_dir, calendar_id):
+    """
+    Streams events into every requested format at once, writing <calendar_id>.<extension> files in output_dir.
+    Returns {format: (path, events written)}.
+    """
+    unknown = [name for name in formats if name not in EXPORT_FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown export format: {', '.join(unknown)} (choose from {', '.join(EXPORT_FORMATS)})")
+
+    os.makedirs(output_dir, exist_ok=True)
+    writers = {}
+    try:
+        for name in formats:
+            extension, writer_class = EXPORT_FORMATS[name]
+            writers[name] = writer_class(os.path.join(output_dir, calendar_id + extension), calendar_id)
+        for event in events:
+            for writer in writers.values():
+                writer.write(event)
+    finally:
+        for writer in writers.values():
+            writer.close()
+    return {name: (writer.path, writer.count) for name, writer in writers.items()}
+
+def export_calendar(calendar_id, formats, output_dir=None, use_partial=False, console=None):
+    """
+    Exports the calendar's latest data, by default into the run directory it is read from.
+    Returns {format: (path, events written)}.
+    """
+    run_dir = snapshot_run_dir(calendar_id, use_partial)
+    results = export_events(run_events(run_dir, use_partial), formats, output_dir or run_dir, calendar_id)
+    for name, (path, count) in results.items():
+        if console:
+            console.print(f"[green]Exported {count} events as {name}:[/] [blue]{path}[/]")
+        else:
+            print(f"Exported {count} events as {name}: {path}")
+    return results
+
+def main(argv=None):
+    """
+    Command line entry point, argv defaults to sys.argv[1:]
+    """
+    import argparse
+    parser = argparse.ArgumentParser(description='Export a scraped calendar to NDJSON, CSV, iCal or columnar files')
+    parser.add_argument('calendar_id')
+    parser.add_argument('-formats', default=','.join(EXPORT_FORMATS),
+                        help=f"Comma separated formats ({', '.join(EXPORT_FORMATS)}), default all")
+    parser.add_argument('-output', metavar='DIR',
+                        help="Directory to write to (default the run the events are read from)")
+    parser.add_argument('-partial', action='store_true', help='Export a partial snapshot if there is no final one')
+    args = parser.parse_args(argv)
+    export_calendar(args.calendar_id, [name for name in args.formats.split(',') if name], args.output,
+                    args.partial)
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,10 @@
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 import json
 import os
+from src.dedup import dedupe_events
+from src.journal import JOURNAL_FILENAME, compact_journal
+from src.manifest import calendar_directory, latest_run_dir, latest_snapshot
+from src.records import filter_records, to_records
 
 def load_calendar_data(calendar_id, use_partial=False, console=None):
     """
@@ -9,71 +13,148 @@ def load_calendar_data(calendar_id, use_partial=False, console=None):
     console: Rich console object for pretty printing
     """
     try:
-        # Find the latest timestamp directory for this calendar
-        base_dir = os.path.join(os.getcwd(), 'calendars', calendar_id)
-        if not os.path.exists(base_dir):
+        # Find the latest run directory for this calendar from its manifest
+        if not os.path.exists(calendar_directory(calendar_id)):
             raise FileNotFoundError(f"No data directory found for calendar: {calendar_id}")
             
-        timestamp_dirs = [d for d in os.listdir(base_dir) if os.path.isdir(os.path.join(base_dir, d))]
-        if not timestamp_dirs:
+        latest_dir = latest_run_dir(calendar_id)
+        if not latest_dir:
             raise FileNotFoundError(f"No data found in calendar directory: {calendar_id}")
-            
-        latest_dir = max([os.path.join(base_dir, d) for d in timestamp_dirs], key=os.path.getmtime)
         
-        # Try final data first, fall back to partial if requested
-        final_path = os.path.join(latest_dir, 'calendar_data_final.json')
-        partial_path = os.path.join(latest_dir, 'calendar_data_partial.json')
+        # A run that crashed before saving only has its journal, recover a partial snapshot from it
+        journal_path = os.path.join(latest_dir, JOURNAL_FILENAME)
+        if (use_partial and not os.path.exists(os.path.join(latest_dir, 'calendar_data_final.json'))
+                and not os.path.exists(os.path.join(latest_dir, 'calendar_data_partial.json'))
+                and os.path.exists(journal_path)):
+            compact_journal(latest_dir, calendar_id, final=False)
+        
+        # Newest final snapshot, or the newest partial one if requested
+        snapshot_path = latest_snapshot(calendar_id, use_partial)
+        if not snapshot_path:
+            raise FileNotFoundError(f"No calendar data found for {calendar_id}")
         
-        if os.path.exists(final_path):
-            with open(final_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        elif use_partial and os.path.exists(partial_path):
+        if snapshot_path.endswith('_partial.json'):
             if console:
                 console.print("[yellow]Using partial data for calendar generation...[/]")
             else:
                 print("Using partial data for calendar generation...")
-            with open(partial_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            raise FileNotFoundError(f"No calendar data found for {calendar_id}")
+        with open(snapshot_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        
+        # Snapshots written by older versions can hold the same event more than once
+        data['events'] = dedupe_events(data.get('events', []))
+        return data
             
     except Exception as e:
         raise Exception(f"Error loading calendar data: {str(e)}")
 
-def generate_calendar(calendar_id, use_partial=False, console=None):
+# Calendars with more events than this get the paged report by default
+PAGED_REPORT_THRESHOLD = 5000
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# Rendered output is written to the file in pieces of this many template chunks
+STREAM_BUFFER = 100
+
+_environment = None
+
+def template_environment():
+    """
+    Returns the Jinja environment shared by every report, created on first use.
+    Compiled templates are kept in memory, and their bytecode in the system temp directory,
+    so neither later reports nor later runs compile the templates again.
+    """
+    global _environment
+    if _environment is None:
+        _environment = Environment(loader=FileSystemLoader(TEMPLATE_DIR), bytecode_cache=FileSystemBytecodeCache())
+    return _environment
+
+def render_to_file(template_name, output_path, **context):
+    """
+    Renders a template straight into output_path without building the whole document in memory
+    """
+    stream = template_environment().get_template(template_name).stream(**context)
+    stream.enable_buffering(STREAM_BUFFER)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        stream.dump(f)
+
+def write_report_data(records, data_dir, chunk_size):
+    """
+    Writes event records as numbered script chunks plus a search index for the paged report.
+    Chunks are JavaScript rather than JSON so the report also works when opened from disk.
+    Returns the number of chunks written.
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    chunk_count = 0
+    
+    for chunk_count, start in enumerate(range(0, len(records), chunk_size), 1):
+        chunk = [record.to_dict() for record in records[start:start + chunk_size]]
+        with open(os.path.join(data_dir, f'chunk_{chunk_count - 1:05d}.js'), 'w', encoding='utf-8') as f:
+            f.write(f"calspyChunk({chunk_count - 1},")
+            json.dump(chunk, f, ensure_ascii=False, separators=(',', ':'))
+            f.write(");\n")
+    
+    # One lowercased line of searchable text per event, in event order
+    search_index = [
+        ' '.join(filter(None, (record.datetime_text, record.summary, record.location,
+                               *record.description_parts))).lower()
+        for record in records
+    ]
+    with open(os.path.join(data_dir, 'index.js'), 'w', encoding='utf-8') as f:
+        f.write("calspyIndex(")
+        json.dump(search_index, f, ensure_ascii=False, separators=(',', ':'))
+        f.write(");\n")
+    
+    return chunk_count
+
+def generate_calendar(calendar_id, use_partial=False, console=None, paged=None, chunk_size=500,
+                      start=None, end=None, store=None):
     """
     Generate HTML calendar from JSON data
     use_partial: if True, will try to use partial data if final data is not available
     console: Rich console object for pretty printing
+    paged: if True, events are written to chunk files next to the HTML and loaded as the page
+           is scrolled. Defaults to True for calendars with more than PAGED_REPORT_THRESHOLD events
+    chunk_size: number of events per chunk file in the paged report
+    start, end: only include events starting in [start, end), as datetimes
+    store: SqliteStore to read events from instead of the JSON snapshot, only the requested range is loaded
     Returns: path to generated HTML file
     """
     try:
-        # Get the absolute path to the template directory
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        template_dir = os.path.join(current_dir, 'templates')
-        
-        # Debug print to see what paths we're working with
-        print(f"Looking for template in: {template_dir}")
-        
-        # Set up Jinja environment
-        env = Environment(loader=FileSystemLoader(template_dir))
-        template = env.get_template('calendar_display_template.html')
-        
         # Load calendar data and get the directory path
-        data = load_calendar_data(calendar_id, use_partial, console)
-        base_dir = os.path.join(os.getcwd(), 'calendars', calendar_id)
-        timestamp_dir = max([os.path.join(base_dir, d) for d in os.listdir(base_dir)], key=os.path.getmtime)
-        
-        # Render template with data
-        html_output = template.render(test_data=data)
+        if store is not None:
+            data = store.load(calendar_id, start, end)
+            start = end = None  # Already applied by the query
+        else:
+            data = load_calendar_data(calendar_id, use_partial, console)
+        timestamp_dir = latest_run_dir(calendar_id) or calendar_directory(calendar_id)
+        os.makedirs(timestamp_dir, exist_ok=True)
         
         # Generate output filename and save in the timestamp directory
         output_filename = f"{calendar_id}.html"
         output_path = os.path.join(timestamp_dir, output_filename)
         
-        # Write to output file
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_output)
+        # Newest events first, like the calendar is scraped
+        records = filter_records(to_records(data['events']), start, end)
+        records.sort(key=lambda record: record.sort_key, reverse=True)
+        
+        if paged is None:
+            paged = len(records) > PAGED_REPORT_THRESHOLD
+        
+        # Render template with data straight to the output file
+        if paged:
+            data_dirname = f"{calendar_id}_data"
+            chunk_count = write_report_data(records, os.path.join(timestamp_dir, data_dirname), chunk_size)
+            render_to_file('calendar_report_template.html', output_path, report={
+                'calendar_id': data['calendar_id'],
+                'scrape_timestamp': data.get('scrape_timestamp'),
+                'event_count': len(records),
+                'chunk_size': chunk_size,
+                'chunk_count': chunk_count,
+                'data_dir': data_dirname
+            })
+        else:
+            render_to_file('calendar_display_template.html', output_path, test_data=data, events=records)
         
         if console:
             console.print(f"[green]Calendar HTML has been generated as:[/] [blue]{output_path}[/]")
@@ -88,9 +169,28 @@ def generate_calendar(calendar_id, use_partial=False, console=None):
         print(traceback.format_exc())
         return False
 
+def main(argv=None):
+    """
+    Command line entry point, argv defaults to sys.argv[1:]
+    """
+    import argparse
+    from datetime import datetime
+    parser = argparse.ArgumentParser(description='Generate the HTML report for a scraped calendar')
+    parser.add_argument('calendar_id')
+    parser.add_argument('-paged', action='store_true', help='Write the paged report regardless of calendar size')
+    parser.add_argument('-sqlite', nargs='?', const='', metavar='PATH',
+                        help='Read events from the SQLite event store (default calendars/calspy.db)')
+    parser.add_argument('-from', dest='start', type=datetime.fromisoformat, metavar='YYYY-MM-DD',
+                        help='Only include events starting on or after this date')
+    parser.add_argument('-to', dest='end', type=datetime.fromisoformat, metavar='YYYY-MM-DD',
+                        help='Only include events starting before this date')
+    args = parser.parse_args(argv)
+    store = None
+    if args.sqlite is not None:
+        from src.storage import SqliteStore
+        store = SqliteStore(args.sqlite or None)
+    generate_calendar(args.calendar_id, paged=True if args.paged else None, start=args.start, end=args.end,
+                      store=store)
+
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) != 2:
-        print("Usage: python generate_calendar.py <calendar_id>")
-        sys.exit(1)
-    generate_calendar(sys.argv[1]) 
\ No newline at end of file
+    main()
@@ -0,0 +1,535 @@
+import logging
+import re
+import urllib.request
+from calendar import monthrange
+from datetime import date, datetime, timedelta, timezone
+from urllib.parse import quote
+from src import metrics
+from src.event_parser import MONTH_NAMES
+
+try:
+    from zoneinfo import ZoneInfo
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+logger = logging.getLogger('scraper')
+
+PUBLIC_FEED_URL = 'https://calendar.google.com/calendar/ical/{calendar_id}/public/basic.ics'
+
+WEEKDAYS = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+
+# Upper bound on the occurrences of one recurring event within the requested window. A feed with more
+# cannot be read completely and raises UnsupportedRecurrence, so the scrape falls back to the browser.
+MAX_OCCURRENCES = 5000
+
+def public_feed_url(calendar_id):
+    """
+    Returns the public iCal feed URL for a calendar ID
+    """
+    return PUBLIC_FEED_URL.format(calendar_id=quote(calendar_id, safe=''))
+
+def read_feed(source, timeout=30):
+    """
+    Returns the text of an iCal feed from a URL or a local .ics file
+    """
+    if source.startswith(('http://', 'https://', 'webcal://')):
+        url = 'https://' + source[len('webcal://'):] if source.startswith('webcal://') else source
+        logger.debug(f"Fetching iCal feed: {url}")
+        request = urllib.request.Request(url, headers={'User-Agent': 'calspy'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            text = response.read().decode('utf-8', errors='replace')
+    else:
+        logger.debug(f"Reading iCal file: {source}")
+        with open(source, 'r', encoding='utf-8') as f:
+            text = f.read()
+
+    if 'BEGIN:VCALENDAR' not in text[:1000]:
+        raise ValueError(f"Not an iCal feed: {source}")
+    return text
+
+def unfold_lines(text):
+    """
+    Joins folded content lines (continuation lines start with a space or tab)
+    """
+    lines = []
+    for line in text.splitlines():
+        if line[:1] in (' ', '\t') and lines:
+            lines[-1] += line[1:]
+        elif line:
+            lines.append(line)
+    return lines
+
+def parse_content_line(line):
+    """
+    Splits 'NAME;PARAM=VALUE:value' into (name, {param: value}, value)
+    """
+    # The value starts at the first colon that is not inside a quoted parameter
+    in_quotes = False
+    for i, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ':' and not in_quotes:
+            head, value = line[:i], line[i + 1:]
+            break
+    else:
+        return line.upper(), {}, ''
+
+    name, *param_parts = head.split(';')
+    params = {}
+    for part in param_parts:
+        key, _, param_value = part.partition('=')
+        params[key.upper()] = param_value.strip('"')
+    return name.upper(), params, value
+
+def unescape_text(value):
+    """
+    Unescapes an iCal TEXT value
+    """
+    result = []
+    chars = iter(value)
+    for char in chars:
+        if char == '\\':
+            escaped = next(chars, '')
+            result.append('\n' if escaped in ('n', 'N') else escaped)
+        else:
+            result.append(char)
+    return ''.join(result)
+
+def escape_text(value):
+    """
+    Escapes a value for an iCal TEXT property, the reverse of unescape_text
+    """
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+def fold_line(line):
+    """
+    Folds a content line into lines of at most 75 octets, continuation lines start with a space
+    """
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    limit = 75
+    while encoded:
+        # Never split inside a UTF-8 sequence
+        cut = min(limit, len(encoded))
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74  # Room for the leading space
+    return '\r\n '.join(parts)
+
+def parse_ics_datetime(value, params, default_tz=None):
+    """
+    Parses a DATE or DATE-TIME value.
+    Returns (datetime or date, all_day). Times are converted to default_tz when possible.
+    """
+    value = value.strip()
+    if params.get('VALUE') == 'DATE' or len(value) == 8:
+        return datetime.strptime(value, '%Y%m%d').date(), True
+
+    utc = value.endswith('Z')
+    parsed = datetime.strptime(value.rstrip('Z'), '%Y%m%dT%H%M%S')
+    tz = None
+    if utc:
+        tz = timezone.utc
+    elif params.get('TZID') and ZoneInfo:
+        try:
+            tz = ZoneInfo(params['TZID'])
+        except Exception:
+            logger.debug(f"Unknown time zone {params['TZID']}, using floating time")
+
+    if tz:
+        parsed = parsed.replace(tzinfo=tz)
+        if default_tz:
+            parsed = parsed.astimezone(default_tz)
+    return parsed, False
+
+def parse_components(text):
+    """
+    Returns (calendar properties, list of VEVENT property lists).
+    Each VEVENT is a list of (name, params, value) tuples.
+    """
+    calendar = {}
+    events = []
+    stack = []
+    current = None
+
+    for line in unfold_lines(text):
+        name, params, value = parse_content_line(line)
+        if name == 'BEGIN':
+            stack.append(value.upper())
+            if value.upper() == 'VEVENT':
+                current = []
+        elif name == 'END':
+            if stack and stack[-1] == 'VEVENT' and current is not None:
+                events.append(current)
+                current = None
+            if stack:
+                stack.pop()
+        elif current is not None and stack[-1:] == ['VEVENT']:
+            current.append((name, params, value))
+        elif stack == ['VCALENDAR']:
+            calendar[name] = value
+    return calendar, events
+
+def add_months(start, months):
+    """
+    Returns start shifted by a number of months, or None if that day does not exist in the target month
+    """
+    total = start.year * 12 + (start.month - 1) + months
+    try:
+        return start.replace(year=total // 12, month=total % 12 + 1)
+    except ValueError:
+        return None
+
+class UnsupportedRecurrence(ValueError):
+    """
+    Raised for recurrence rules expand_rrule cannot expand, so the feed is not used with occurrences missing
+    """
+
+BYDAY_PATTERN = re.compile(r'^([+-]?\d{1,2})?(MO|TU|WE|TH|FR|SA|SU)$')
+
+def parse_byday(value):
+    """
+    Returns [(ordinal or None, weekday)] for a BYDAY value such as 'MO,WE' or '2TU,-1FR'
+    """
+    days = []
+    for part in value.split(','):
+        match = BYDAY_PATTERN.match(part.strip().upper())
+        if not match:
+            raise UnsupportedRecurrence(f"Unsupported BYDAY value {part}")
+        days.append((int(match.group(1)) if match.group(1) else None, WEEKDAYS[match.group(2)]))
+    return days
+
+def nth_weekdays(first, last, byday):
+    """
+    Returns the set of dates between first and last (inclusive) that match BYDAY values,
+    ordinals count within that range, e.g. 2TU is its second Tuesday and -1FR its last Friday
+    """
+    days = set()
+    for ordinal, weekday in byday:
+        matching = []
+        day = first + timedelta(days=(weekday - first.weekday()) % 7)
+        while day <= last:
+            matching.append(day)
+            day += timedelta(weeks=1)
+        if ordinal is None:
+            days.update(matching)
+        elif 0 < ordinal <= len(matching) or 0 < -ordinal <= len(matching):
+            days.add(matching[ordinal - 1 if ordinal > 0 else ordinal])
+    return days
+
+def month_dates(year, month, monthdays, byday, default_day):
+    """
+    Returns the dates of a month matching BYMONTHDAY and BYDAY, or default_day if neither is given
+    """
+    length = monthrange(year, month)[1]
+    if monthdays:
+        days = {date(year, month, day if day > 0 else length + day + 1)
+                for day in monthdays if 0 < day <= length or 0 < -day <= length}
+        if byday:
+            weekdays = {weekday for _, weekday in byday}
+            days = {day for day in days if day.weekday() in weekdays}
+        return days
+    if byday:
+        return nth_weekdays(date(year, month, 1), date(year, month, length), byday)
+    return {date(year, month, default_day)} if default_day <= length else set()
+
+def expand_rrule(start, rule, until_bound, exdates=(), since_bound=None):
+    """
+    Yields occurrence starts of a recurrence rule from since_bound (if given) up to until_bound.
+    Supports FREQ DAILY/WEEKLY/MONTHLY/YEARLY with INTERVAL, COUNT, UNTIL, BYDAY (with ordinals such as 2TU
+    in monthly and yearly rules), BYMONTHDAY, BYMONTH and BYSETPOS.
+    Raises UnsupportedRecurrence for anything else (e.g. BYHOUR, BYWEEKNO or HOURLY rules), and when
+    more than MAX_OCCURRENCES occurrences fall between the bounds.
+    """
+    parts = dict(part.split('=', 1) for part in rule.split(';') if '=' in part)
+    freq = parts.get('FREQ')
+    interval = int(parts.get('INTERVAL', 1))
+    count = int(parts['COUNT']) if 'COUNT' in parts else None
+    until = None
+    if 'UNTIL' in parts:
+        is_datetime = isinstance(start, datetime)
+        until, _ = parse_ics_datetime(parts['UNTIL'], {}, start.tzinfo if is_datetime else None)
+        if is_datetime and not isinstance(until, datetime):
+            until = datetime.combine(until, datetime.max.time()).replace(tzinfo=start.tzinfo)
+        elif is_datetime and start.tzinfo is None:
+            until = until.replace(tzinfo=None)
+        elif not is_datetime and isinstance(until, datetime):
+            until = until.date()
+
+    unsupported = set(parts) - {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'WKST', 'BYDAY', 'BYMONTHDAY', 'BYMONTH',
+                                'BYSETPOS'}
+    if freq not in ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY') or unsupported:
+        raise UnsupportedRecurrence(f"Unsupported recurrence rule {rule}")
+    byday = parse_byday(parts['BYDAY']) if 'BYDAY' in parts else []
+    monthdays = [int(day) for day in parts['BYMONTHDAY'].split(',')] if 'BYMONTHDAY' in parts else []
+    bymonth = {int(month) for month in parts['BYMONTH'].split(',')} if 'BYMONTH' in parts else set()
+    setpos = [int(position) for position in parts['BYSETPOS'].split(',')] if 'BYSETPOS' in parts else []
+    ordinals = any(ordinal is not None for ordinal, _ in byday)
+    if (ordinals and (freq in ('DAILY', 'WEEKLY') or monthdays)) or (setpos and freq in ('DAILY', 'WEEKLY')) or (
+            monthdays and freq == 'WEEKLY'):
+        raise UnsupportedRecurrence(f"Unsupported recurrence rule {rule}")
+
+    def period_dates(year, month=None):
+        """
+        Dates of one MONTHLY (month given) or YEARLY period, sorted and narrowed by BYSETPOS
+        """
+        if month is not None:
+            dates = month_dates(year, month, monthdays, byday, start.day) if not bymonth or month in bymonth else set()
+        elif bymonth or monthdays or not byday:
+            dates = set()
+            for month in sorted(bymonth) if bymonth else range(1, 13) if monthdays else [start.month]:
+                dates |= month_dates(year, month, monthdays, byday, start.day)
+        else:
+            # Ordinals of yearly BYDAY rules without BYMONTH count within the year, e.g. 20MO
+            dates = nth_weekdays(date(year, 1, 1), date(year, 12, 31), byday)
+        dates = sorted(dates)
+        if setpos:
+            dates = sorted({dates[position - 1 if position > 0 else position]
+                            for position in setpos if 0 < position <= len(dates) or 0 < -position <= len(dates)})
+        return dates
+
+    def candidates():
+        if freq in ('MONTHLY', 'YEARLY'):
+            step = 0
+            while True:
+                if freq == 'MONTHLY':
+                    total = start.year * 12 + start.month - 1 + step
+                    year, month = total // 12, total % 12 + 1
+                else:
+                    year, month = start.year + step, None
+                first_day = start.replace(year=year, month=month or 1, day=1)
+                if first_day > until_bound or (until is not None and first_day > until):
+                    return
+                for day in period_dates(year, month):
+                    candidate = start.replace(year=day.year, month=day.month, day=day.day)
+                    if candidate >= start:
+                        yield candidate
+                step += interval
+        elif freq == 'WEEKLY' and byday:
+            weekdays = sorted({weekday for _, weekday in byday})
+            week_start = start - timedelta(days=start.weekday())
+            week = 0
+            while True:
+                for weekday in weekdays:
+                    candidate = week_start + timedelta(weeks=week, days=weekday)
+                    if candidate >= start:
+                        yield candidate
+                week += interval
+        else:
+            step = 0
+            while True:
+                yield start + timedelta(days=step) if freq == 'DAILY' else start + timedelta(weeks=step)
+                step += interval
+
+    def limited(occurrence):
+        # BYMONTH, and BYDAY/BYMONTHDAY of daily rules, only narrow down the occurrences of daily and weekly rules
+        if freq in ('MONTHLY', 'YEARLY'):
+            return False
+        if bymonth and occurrence.month not in bymonth:
+            return True
+        if freq == 'DAILY' and byday and occurrence.weekday() not in {weekday for _, weekday in byday}:
+            return True
+        if freq == 'DAILY' and monthdays:
+            length = monthrange(occurrence.year, occurrence.month)[1]
+            return not any(occurrence.day == (day if day > 0 else length + day + 1) for day in monthdays)
+        return False
+
+    generated = 0  # Occurrences so far, earlier ones still count towards COUNT
+    kept = 0
+    for occurrence in candidates():
+        if until is not None and occurrence > until:
+            return
+        if occurrence > until_bound:
+            return
+        if limited(occurrence):
+            continue
+        generated += 1
+        if count is not None and generated > count:
+            return
+        if since_bound is not None and occurrence < since_bound:
+            continue
+        kept += 1
+        if kept > MAX_OCCURRENCES:
+            raise UnsupportedRecurrence(f"Recurrence rule {rule} has more than {MAX_OCCURRENCES} occurrences")
+        if occurrence not in exdates:
+            yield occurrence
+
+def label_time(moment):
+    """
+    Formats a time the way Google Calendar labels show it, e.g. '10am' or '3:30pm'
+    """
+    hour = moment.hour % 12 or 12
+    minutes = f":{moment.minute:02d}" if moment.minute else ''
+    return f"{hour}{minutes}{'am' if moment.hour < 12 else 'pm'}"
+
+def format_event_datetime(start, all_day, end=None):
+    """
+    Formats an event's datetime text the way events scraped from the page store it,
+    e.g. 'March 14, 2024 10am to 11am' or 'March 14, 2024 All day'
+    """
+    date_text = f"{MONTH_NAMES[start.month - 1]} {start.day}, {start.year}"
+    if all_day:
+        return f"{date_text} All day"
+    if end is not None:
+        return f"{date_text} {label_time(start)} to {label_time(end)}"
+    return f"{date_text} {label_time(start)}"
+
+def build_event(properties, start, all_day, duration=None, timezone_name=None):
+    """
+    Builds an event dict in the shape produced by parse_month_events
+    duration: timedelta between DTSTART and DTEND, if the event has an end
+    timezone_name: name of the calendar's time zone the times are expressed in
+    """
+    summary = ''
+    location = ''
+    description = []
+    attendees = []
+    for name, params, value in properties:
+        if name == 'SUMMARY':
+            summary = unescape_text(value).strip()
+        elif name == 'LOCATION':
+            location = unescape_text(value).strip()
+        elif name == 'DESCRIPTION':
+            text = unescape_text(value).strip()
+            if text:
+                description.append(text)
+        elif name == 'ATTENDEE':
+            attendees.append(params.get('CN') or value.replace('mailto:', ''))
+
+    if all_day:
+        # DTEND of all-day events is exclusive, stored end dates are inclusive
+        end = start + duration - timedelta(days=1) if duration and duration.days > 1 else start
+        start_text, end_text = start.isoformat(), end.isoformat()
+    else:
+        local_start = start.replace(tzinfo=None)
+        end = local_start + duration if duration is not None else None
+        start_text = local_start.isoformat()
+        end_text = end.isoformat() if end is not None else None
+
+    return {
+        'datetime': format_event_datetime(start, all_day, None if all_day else end),
+        'summary': summary,
+        'description': ' | '.join(description),
+        'location': location,
+        'attendees': attendees,
+        'start': start_text,
+        'end': end_text,
+        'all_day': all_day,
+        'timezone': timezone_name,
+        'calendar': ''
+    }
+
+def parse_ics(text, until=None, since=None):
+    """
+    Parses an iCal feed into a list of (start, event) tuples sorted by start.
+    Recurring events are expanded from `since` up to `until`, naive datetimes (defaults: from the first
+    occurrence, to one year from now).
+    Raises UnsupportedRecurrence if a recurring event uses a rule that cannot be expanded.
+    """
+    calendar, components = parse_components(text)
+    default_tz = None
+    if calendar.get('X-WR-TIMEZONE') and ZoneInfo:
+        try:
+            default_tz = ZoneInfo(calendar['X-WR-TIMEZONE'])
+        except Exception:
+            logger.debug(f"Unknown calendar time zone {calendar['X-WR-TIMEZONE']}")
+
+    until = until or datetime.now() + timedelta(days=366)
+
+    def sort_key(start):
+        moment = start if isinstance(start, datetime) else datetime.combine(start, datetime.min.time())
+        return moment.replace(tzinfo=None)
+
+    # Instances that override a single occurrence of a recurring event
+    overridden = set()
+    for properties in components:
+        uid = next((value for name, _, value in properties if name == 'UID'), None)
+        for name, params, value in properties:
+            if name == 'RECURRENCE-ID':
+                recurrence_id, _ = parse_ics_datetime(value, params, default_tz)
+                overridden.add((uid, sort_key(recurrence_id)))
+
+    results = []
+    for properties in components:
+        try:
+            values = {}
+            exdates = set()
+            for name, params, value in properties:
+                if name == 'EXDATE':
+                    for exdate in value.split(','):
+                        exdates.add(parse_ics_datetime(exdate, params, default_tz)[0])
+                else:
+                    values.setdefault(name, (params, value))
+
+            if 'DTSTART' not in values:
+                continue
+            status = values.get('STATUS', ({}, ''))[1].upper()
+            if status == 'CANCELLED':
+                continue
+
+            start, all_day = parse_ics_datetime(values['DTSTART'][1], values['DTSTART'][0], default_tz)
+            uid = values.get('UID', ({}, None))[1]
+            duration = None
+            if 'DTEND' in values:
+                end, _ = parse_ics_datetime(values['DTEND'][1], values['DTEND'][0], default_tz)
+                if type(end) is type(start):
+                    duration = end - start
+            timezone_name = calendar.get('X-WR-TIMEZONE') if default_tz else None
+
+            recurring = 'RRULE' in values and 'RECURRENCE-ID' not in values
+            if recurring:
+                if isinstance(start, datetime):
+                    bound = until.replace(tzinfo=start.tzinfo)
+                    since_bound = since.replace(tzinfo=start.tzinfo) if since else None
+                else:
+                    bound, since_bound = until.date(), since.date() if since else None
+                occurrences = expand_rrule(start, values['RRULE'][1], bound, exdates, since_bound)
+            else:
+                occurrences = [start]
+
+            for occurrence in occurrences:
+                # Occurrences with their own overriding VEVENT are added from that VEVENT instead
+                if recurring and (uid, sort_key(occurrence)) in overridden:
+                    continue
+                results.append((sort_key(occurrence), build_event(properties, occurrence, all_day, duration, timezone_name)))
+        except UnsupportedRecurrence as e:
+            # Keeping only some occurrences would silently leave months incomplete
+            logger.warning(f"{e}, the feed cannot be read completely")
+            metrics.increment('ics_unsupported_rules')
+            raise
+        except Exception as e:
+            logger.warning(f"Could not parse an iCal event completely: {e}")
+            continue
+
+    results.sort(key=lambda item: item[0])
+    return results
+
+def events_by_month(text, until=None, since=None):
+    """
+    Parses an iCal feed and groups events by 'YYYY-MM' month key.
+    Only events starting between since and until are kept, every month in between is
+    present in the result (empty months map to []).
+    """
+    results = parse_ics(text, until=until, since=since)
+    months = {}
+    for start, event in results:
+        if (until and start > until) or (since and start < since):
+            continue
+        months.setdefault(start.strftime('%Y-%m'), []).append(event)
+
+    if not months and not since:
+        return months
+
+    # Fill in empty months so the captured range is contiguous
+    first = since or datetime.strptime(min(months), '%Y-%m')
+    last = until or datetime.strptime(max(months), '%Y-%m')
+    month = datetime(first.year, first.month, 1)
+    while (month.year, month.month) <= (last.year, last.month):
+        months.setdefault(month.strftime('%Y-%m'), [])
+        month = datetime(month.year + month.month // 12, month.month % 12 + 1, 1)
+    return months
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import threading
+import time
+from src.dedup import dedupe_events
+from src.manifest import read_manifest, rebuild_manifest, record_run
+
+logger = logging.getLogger('scraper')
+
+JOURNAL_FILENAME = 'calendar_data.jsonl'
+
+class EventJournal:
+    """
+    Append-only JSON Lines journal of scraped months.
+    Each line holds one month of events and is fsync'd as soon as it is written,
+    so a crashed or interrupted scrape loses at most the month in flight.
+    """
+
+    def __init__(self, calendar_id, run_dir):
+        self.calendar_id = calendar_id
+        self.run_dir = run_dir
+        self.path = os.path.join(run_dir, JOURNAL_FILENAME)
+        self._lock = threading.Lock()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def append_month(self, month, heading, events, scraped_at=None):
+        """
+        Appends one month of events, month is a 'YYYY-MM' key
+        """
+        line = json.dumps({
+            'month': month,
+            'heading': heading,
+            'scraped_at': scraped_at or time.strftime('%Y-%m-%d %H:%M:%S'),
+            'events': events
+        }, ensure_ascii=False)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+def read_journal(path):
+    """
+    Yields month records from a journal file.
+    A truncated last line (from a crash mid-write) is skipped.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Skipping unreadable journal line {line_number} in {path}")
+
+def journal_months(path):
+    """
+    Yields (month, events) from a journal, newest month first, reading one month into memory at a time.
+    If a month was written more than once, the latest record wins.
+    """
+    # First pass: where each record of each month starts, oldest first
+    offsets = {}
+    with open(path, 'rb') as f:
+        offset = 0
+        for line in f:
+            stripped = line.rstrip()
+            # EventJournal writes the month first, so complete lines only need a full parse if written otherwise.
+            # A last line without its newline may have been cut off mid-write and is always parsed.
+            if line.endswith(b'\n') and stripped.startswith(b'{"month": "') and stripped.endswith(b'}'):
+                offsets.setdefault(stripped[11:18].decode('ascii', 'replace'), []).append(offset)
+            elif stripped:
+                try:
+                    offsets.setdefault(json.loads(stripped)['month'], []).append(offset)
+                except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError):
+                    logger.warning(f"Skipping unreadable journal line at byte {offset} in {path}")
+            offset += len(line)
+
+    # Second pass: the latest record of each month that parses, falling back to earlier ones
+    with open(path, 'rb') as f:
+        for month in sorted(offsets, reverse=True):
+            for offset in reversed(offsets[month]):
+                f.seek(offset)
+                try:
+                    record = json.loads(f.readline())
+                    break
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    logger.warning(f"Skipping unreadable journal record for {month} at byte {offset} in {path}")
+            else:
+                continue
+            yield record['month'], record['events']
+
+def journal_events(path):
+    """
+    Returns the events in a journal, newest month first.
+    If a month was written more than once, the latest record wins. Events seen in
+    more than one month view are only returned once.
+    """
+    return dedupe_events(event for _, events in journal_months(path) for event in events)
+
+def load_previous_months(calendar_dir, exclude_dir=None):
+    """
+    Returns {'YYYY-MM': month record} of the months journaled by the calendar's latest previous run.
+    Each run starts by carrying the months of the run before it into its own journal, so the latest run
+    that saved a snapshot already holds every captured month and older journals are not read.
+    """
+    months = {}
+    if not os.path.isdir(calendar_dir):
+        return months
+
+    manifest = read_manifest(calendar_dir) or rebuild_manifest(calendar_dir, os.path.basename(calendar_dir))
+    exclude_name = os.path.basename(os.path.abspath(exclude_dir)) if exclude_dir else None
+    journal_paths = []
+    for run_name in reversed(list(manifest['runs'])):
+        journal_path = os.path.join(calendar_dir, run_name, JOURNAL_FILENAME)
+        if run_name != exclude_name and os.path.isfile(journal_path):
+            journal_paths.append((manifest['runs'][run_name]['status'] != 'running', journal_path))
+    if not journal_paths:
+        return months
+
+    # A run that never saved may have stopped while carrying months over, prefer the latest one that did
+    _, journal_path = max(journal_paths, key=lambda item: item[0])
+    for record in read_journal(journal_path):
+        months[record['month']] = record
+    return months
+
+def write_snapshot(run_dir, calendar_id, events, status):
+    """
+    Writes events in the calendar_data_<status>.json layout used by generate_calendar.
+    The file is written to a temporary name and renamed into place, then recorded in the calendar's manifest.
+    """
+    json_path = os.path.join(run_dir, f'calendar_data_{status}.json')
+    data = {
+        'calendar_id': calendar_id,
+        'scrape_timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'scrape_status': status,
+        'events': events
+    }
+
+    tmp_path = json_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, json_path)
+    record_run(run_dir, calendar_id, status, json_path, len(events))
+    return json_path
+
+def compact_journal(run_dir, calendar_id, final=False):
+    """
+    Compacts the journal in run_dir into calendar_data_final.json (or _partial.json)
+    Returns (json_path, events)
+    """
+    events = journal_events(os.path.join(run_dir, JOURNAL_FILENAME))
+    status = 'final' if final else 'partial'
+    return write_snapshot(run_dir, calendar_id, events, status), events
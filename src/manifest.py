@@ -0,0 +1,135 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger('scraper')
+
+MANIFEST_FILENAME = 'manifest.json'
+
+# Serializes read-modify-write of a manifest between threads of this process (batch mode).
+# Each calendar has its own manifest, so scrapes of different calendars never share a file.
+_locks = {}
+_locks_guard = threading.Lock()
+
+def calendar_directory(calendar_id):
+    """
+    Returns the calendars/<calendar_id> directory that holds the calendar's runs and manifest
+    """
+    return os.path.join(os.getcwd(), 'calendars', calendar_id)
+
+def manifest_lock(calendar_dir):
+    with _locks_guard:
+        return _locks.setdefault(os.path.abspath(calendar_dir), threading.RLock())
+
+def read_manifest(calendar_dir):
+    """
+    Returns the calendar's manifest, or None if it has none (or it cannot be read)
+    """
+    try:
+        with open(os.path.join(calendar_dir, MANIFEST_FILENAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Ignoring unreadable manifest in {calendar_dir}: {e}")
+        return None
+
+def write_manifest(calendar_dir, manifest):
+    """
+    Writes the manifest to a temporary name and renames it into place
+    """
+    path = os.path.join(calendar_dir, MANIFEST_FILENAME)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def empty_manifest(calendar_id):
+    return {'calendar_id': calendar_id, 'latest': None, 'runs': {}}
+
+def record_run(run_dir, calendar_id, status='running', snapshot_path=None, event_count=None):
+    """
+    Records a run and its latest snapshot in the calendar's manifest.
+    status: 'running' when the run directory is created, then 'partial' or 'final' as snapshots are saved.
+    A final run is not downgraded by a later partial save of the same run.
+    """
+    calendar_dir = os.path.dirname(os.path.abspath(run_dir))
+    run_name = os.path.basename(os.path.abspath(run_dir))
+    now = time.strftime('%Y-%m-%d %H:%M:%S')
+
+    with manifest_lock(calendar_dir):
+        manifest = read_manifest(calendar_dir) or rebuild_manifest(calendar_dir, calendar_id)
+        run = manifest['runs'].get(run_name)
+        if run is None:
+            run = manifest['runs'][run_name] = {'started': now, 'status': 'running', 'snapshot': None,
+                                                'event_count': 0}
+        if status == 'running':
+            manifest['latest'] = run_name
+        if status != 'running' and not (run['status'] == 'final' and status == 'partial'):
+            run['status'] = status
+            run['snapshot'] = os.path.basename(snapshot_path) if snapshot_path else None
+            run['event_count'] = event_count
+        run['updated'] = now
+        write_manifest(calendar_dir, manifest)
+    return run
+
+def rebuild_manifest(calendar_dir, calendar_id):
+    """
+    Builds a manifest for a calendar scraped before manifests existed, by scanning its run directories once.
+    Runs are ordered by modification time, like earlier versions picked the latest one.
+    """
+    manifest = empty_manifest(calendar_id)
+    run_dirs = [os.path.join(calendar_dir, d) for d in os.listdir(calendar_dir)]
+    run_dirs = sorted((d for d in run_dirs if os.path.isdir(d)), key=os.path.getmtime)
+
+    for run_dir in run_dirs:
+        run = {'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(os.path.getmtime(run_dir))),
+               'status': 'running', 'snapshot': None, 'event_count': None}
+        for status in ('partial', 'final'):
+            if os.path.exists(os.path.join(run_dir, f'calendar_data_{status}.json')):
+                run['status'] = status
+                run['snapshot'] = f'calendar_data_{status}.json'
+        manifest['runs'][os.path.basename(run_dir)] = run
+        manifest['latest'] = os.path.basename(run_dir)
+
+    with manifest_lock(calendar_dir):
+        write_manifest(calendar_dir, manifest)
+    return manifest
+
+def load_manifest(calendar_id):
+    """
+    Returns (calendar_dir, manifest), building the manifest if the calendar does not have one yet.
+    manifest is None if the calendar has never been scraped.
+    """
+    calendar_dir = calendar_directory(calendar_id)
+    if not os.path.isdir(calendar_dir):
+        return calendar_dir, None
+    return calendar_dir, read_manifest(calendar_dir) or rebuild_manifest(calendar_dir, calendar_id)
+
+def latest_run_dir(calendar_id):
+    """
+    Returns the directory of the calendar's most recently started run, or None if it has no runs
+    """
+    calendar_dir, manifest = load_manifest(calendar_id)
+    if not manifest or not manifest['latest']:
+        return None
+    return os.path.join(calendar_dir, manifest['latest'])
+
+def latest_snapshot(calendar_id, use_partial=False):
+    """
+    Returns the path of the newest final snapshot (or partial snapshot if use_partial), or None.
+    Runs that were started but never saved anything are passed over.
+    """
+    calendar_dir, manifest = load_manifest(calendar_id)
+    if not manifest:
+        return None
+    statuses = ('final', 'partial') if use_partial else ('final',)
+    for run_name in reversed(list(manifest['runs'])):
+        run = manifest['runs'][run_name]
+        if run['status'] in statuses and run['snapshot']:
+            path = os.path.join(calendar_dir, run_name, run['snapshot'])
+            if os.path.exists(path):
+                return path
+    return None
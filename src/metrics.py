@@ -0,0 +1,150 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds of the histogram buckets every timer is counted into
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+METRICS_FILENAME = 'calendar_metrics.json'
+
+# Counters by name, e.g. months, events, empty_months
+counters = {}
+# Timers by name, each {'count', 'total', 'min', 'max', 'buckets'} with one bucket count per BUCKETS entry
+# plus one for slower observations
+timers = {}
+_lock = threading.Lock()
+_started = time.time()
+
+def metric_name(name):
+    """
+    Returns name as a lowercase identifier, e.g. 'month change (timeout)' -> 'month_change_timeout'
+    """
+    return re.sub(r'[^a-z0-9]+', '_', name.lower()).strip('_')
+
+def reset():
+    """
+    Clears all counters and timers, called at the start of each run
+    """
+    global _started
+    with _lock:
+        counters.clear()
+        timers.clear()
+        _started = time.time()
+
+def increment(name, amount=1):
+    """
+    Adds amount to a counter
+    """
+    name = metric_name(name)
+    with _lock:
+        counters[name] = counters.get(name, 0) + amount
+
+def observe(name, seconds):
+    """
+    Records one duration for a timer
+    """
+    name = metric_name(name)
+    with _lock:
+        timer = timers.get(name)
+        if timer is None:
+            timer = timers[name] = {'count': 0, 'total': 0.0, 'min': seconds, 'max': seconds,
+                                    'buckets': [0] * (len(BUCKETS) + 1)}
+        timer['count'] += 1
+        timer['total'] += seconds
+        timer['min'] = min(timer['min'], seconds)
+        timer['max'] = max(timer['max'], seconds)
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            index = len(BUCKETS)
+        timer['buckets'][index] += 1
+
+@contextmanager
+def timed(name):
+    """
+    Times the enclosed block (or decorated function) into a timer, including when it raises
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+def snapshot():
+    """
+    Returns the current counters and timers as a JSON-serializable dict
+    """
+    with _lock:
+        data = {
+            'started': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(_started)),
+            'elapsed': time.time() - _started,
+            'counters': dict(counters),
+            'timers': {}
+        }
+        for name, timer in timers.items():
+            data['timers'][name] = {
+                'count': timer['count'],
+                'total': timer['total'],
+                'mean': timer['total'] / timer['count'],
+                'min': timer['min'],
+                'max': timer['max'],
+                'buckets': {str(bound): count for bound, count in zip(BUCKETS + ('+Inf',), timer['buckets'])}
+            }
+    return data
+
+def write_metrics(run_dir, calendar_id=None):
+    """
+    Writes the metrics snapshot to calendar_metrics.json in run_dir and returns its path
+    """
+    data = snapshot()
+    data['calendar_id'] = calendar_id
+    path = os.path.join(run_dir, METRICS_FILENAME)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return path
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def prometheus_text(labels=None):
+    """
+    Returns the metrics in the Prometheus text exposition format.
+    Counters become calspy_<name>_total, timers become calspy_<name>_seconds histograms.
+    """
+    data = snapshot()
+    label_text = ','.join(f'{key}="{escape_label(value)}"' for key, value in (labels or {}).items())
+
+    def series(name, extra=''):
+        joined = ','.join(filter(None, (label_text, extra)))
+        return f"{name}{{{joined}}}" if joined else name
+
+    lines = []
+    for name, value in sorted(data['counters'].items()):
+        metric = f"calspy_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{series(metric)} {value}")
+
+    for name, timer in sorted(data['timers'].items()):
+        metric = f"calspy_{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, count in timer['buckets'].items():
+            cumulative += count
+            bucket = f'le="{bound}"'
+            lines.append(f"{series(metric + '_bucket', bucket)} {cumulative}")
+        lines.append(f"{series(metric + '_sum')} {timer['total']:.6f}")
+        lines.append(f"{series(metric + '_count')} {timer['count']}")
+
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus(path, labels=None):
+    """
+    Writes prometheus_text() to path and returns it
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text(labels))
+    return path
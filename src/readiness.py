@@ -0,0 +1,146 @@
+import logging
+import time
+from src import metrics
+
+logger = logging.getLogger('scraper')
+
+# Default wait settings, overridden from the command line with configure_waits
+settings = {
+    'timeout': 10,  # Maximum seconds to wait for the page to become ready
+    'settle': 0.5,  # Seconds the event grid must stay unchanged to count as rendered
+    'poll': 0.1,  # Seconds between DOM checks
+}
+
+# Returns [month heading, event count, total event text length] for the visible view
+FINGERPRINT_SCRIPT = """
+var heading = document.querySelector(".UyW9db, [role='heading'][class*='month']");
+var spans = document.querySelectorAll("div.KF4T6b span.XuJrye");
+var textLength = 0;
+for (var i = 0; i < spans.length; i++) {
+    textLength += spans[i].textContent.length;
+}
+return [heading ? heading.textContent : null, spans.length, textLength];
+"""
+
+# Returns [entry count, total label text length] for the agenda list
+AGENDA_FINGERPRINT_SCRIPT = """
+var spans = document.querySelectorAll("[role='button'] span.XuJrye");
+var textLength = 0;
+for (var i = 0; i < spans.length; i++) {
+    textLength += spans[i].textContent.length;
+}
+return [spans.length, textLength];
+"""
+
+def configure_waits(timeout=None, settle=None, poll=None):
+    """
+    Overrides the default wait settings
+    """
+    if timeout is not None:
+        settings['timeout'] = timeout
+    if settle is not None:
+        settings['settle'] = settle
+    if poll is not None:
+        settings['poll'] = poll
+
+def grid_fingerprint(driver):
+    """
+    Returns a cheap fingerprint of the month heading and event grid
+    """
+    try:
+        return tuple(driver.execute_script(FINGERPRINT_SCRIPT))
+    except Exception as e:
+        logger.debug(f"Could not read grid fingerprint: {str(e)}")
+        return None
+
+def agenda_fingerprint(driver):
+    """
+    Returns a cheap fingerprint of the agenda list
+    """
+    try:
+        return tuple(driver.execute_script(AGENDA_FINGERPRINT_SCRIPT))
+    except Exception as e:
+        logger.debug(f"Could not read agenda fingerprint: {str(e)}")
+        return None
+
+def record_wait(kind, seconds):
+    """
+    Records how long a wait took in the wait_<kind> timer of the run metrics
+    """
+    metrics.observe(f"wait {kind}", seconds)
+    logger.debug(f"Waited {seconds:.2f}s for {kind}")
+
+def summarize_waits():
+    """
+    Returns {kind: {'count', 'mean', 'max', 'total'}} for the waits of the current run, read from the run metrics.
+    Kinds are given as words, e.g. 'month change timeout'.
+    """
+    timers = metrics.snapshot()['timers']
+    return {name[5:].replace('_', ' '): {key: timer[key] for key in ('count', 'mean', 'max', 'total')}
+            for name, timer in timers.items() if name.startswith('wait_')}
+
+def wait_until_settled(driver, kind, changed, timeout=None, settle=None, poll=None, fingerprint_of=grid_fingerprint):
+    """
+    Polls the grid fingerprint (or fingerprint_of(driver)) until changed(fingerprint) is true and the fingerprint
+    has stayed the same for `settle` seconds.
+    Returns the seconds waited, raises TimeoutError if the page is not ready in time.
+    """
+    timeout = settings['timeout'] if timeout is None else timeout
+    settle = settings['settle'] if settle is None else settle
+    poll = settings['poll'] if poll is None else poll
+
+    start = time.monotonic()
+    last = None
+    stable_since = None
+
+    while True:
+        now = time.monotonic()
+        fingerprint = fingerprint_of(driver)
+
+        if fingerprint and changed(fingerprint):
+            if fingerprint != last:
+                last = fingerprint
+                stable_since = now
+            elif now - stable_since >= settle:
+                elapsed = now - start
+                record_wait(kind, elapsed)
+                return elapsed
+        else:
+            last = None
+            stable_since = None
+
+        if now - start >= timeout:
+            elapsed = now - start
+            record_wait(f"{kind} (timeout)", elapsed)
+            metrics.increment('wait_timeouts')
+            raise TimeoutError(f"Page not ready after {elapsed:.1f}s waiting for {kind}")
+
+        time.sleep(poll)
+
+def wait_for_grid_ready(driver, timeout=None, settle=None):
+    """
+    Waits for the first month view to render after loading the calendar URL
+    """
+    return wait_until_settled(driver, 'initial render', lambda fingerprint: fingerprint[0],
+                              timeout=timeout, settle=settle)
+
+def wait_for_month_change(driver, previous, timeout=None, settle=None):
+    """
+    Waits for the month heading to change from the `previous` fingerprint and the
+    event grid to stabilize after navigating
+    """
+    previous_heading = previous[0] if previous else None
+
+    def changed(fingerprint):
+        if previous_heading:
+            return fingerprint[0] != previous_heading
+        return fingerprint != previous
+
+    return wait_until_settled(driver, 'month change', changed, timeout=timeout, settle=settle)
+
+def wait_for_agenda(driver, previous=0, timeout=None, settle=None):
+    """
+    Waits for the agenda list to show more than `previous` entries and stop changing
+    """
+    return wait_until_settled(driver, 'agenda', lambda fingerprint: fingerprint[0] > previous,
+                              timeout=timeout, settle=settle, fingerprint_of=agenda_fingerprint)
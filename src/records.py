@@ -0,0 +1,129 @@
+from datetime import date, datetime
+from src.event_parser import parse_datetime_text
+
+class EventRecord:
+    """
+    Compact in-memory event with parsed start and end times.
+    Stored events are dicts (see parse_month_events), records are built from them once on load
+    so sorting, filtering and rendering never have to re-parse strings.
+    """
+
+    __slots__ = ('start', 'end', 'all_day', 'timezone', 'summary', 'location', 'description_parts',
+                 'calendar', 'attendees', 'datetime_text')
+
+    def __init__(self, start, end, all_day, timezone, summary, location, description_parts, calendar,
+                 attendees, datetime_text):
+        self.start = start                          # datetime, or date for all-day events, None if unknown
+        self.end = end                              # datetime, or inclusive end date for all-day events
+        self.all_day = all_day
+        self.timezone = timezone                    # Time zone name the times are expressed in, if known
+        self.summary = summary
+        self.location = location
+        self.description_parts = description_parts  # Tuple of description parts
+        self.calendar = calendar
+        self.attendees = attendees                  # Tuple of attendee names
+        self.datetime_text = datetime_text          # Date and time as shown in the calendar
+
+    @classmethod
+    def from_dict(cls, event):
+        """
+        Builds a record from a stored event dict.
+        Events saved before start/end were stored get them parsed from the datetime text.
+        """
+        start_text = event.get('start')
+        end_text = event.get('end')
+        all_day = event.get('all_day', False)
+        if start_text is None and 'all_day' not in event:
+            start_text, end_text, all_day = parse_datetime_text(event.get('datetime'))
+
+        description = event.get('description') or ''
+        return cls(
+            start=parse_iso(start_text, all_day),
+            end=parse_iso(end_text, all_day),
+            all_day=all_day,
+            timezone=event.get('timezone'),
+            summary=event.get('summary', ''),
+            location=event.get('location', ''),
+            description_parts=tuple(description.split(' | ')) if description else (),
+            calendar=event.get('calendar', ''),
+            attendees=tuple(event.get('attendees') or ()),
+            datetime_text=event.get('datetime', '')
+        )
+
+    def to_dict(self):
+        """
+        Returns the stored event dict for this record
+        """
+        return {
+            'datetime': self.datetime_text,
+            'summary': self.summary,
+            'description': ' | '.join(self.description_parts),
+            'location': self.location,
+            'attendees': list(self.attendees),
+            'start': self.start.isoformat() if self.start else None,
+            'end': self.end.isoformat() if self.end else None,
+            'all_day': self.all_day,
+            'timezone': self.timezone,
+            'calendar': self.calendar
+        }
+
+    @property
+    def start_datetime(self):
+        """
+        Start as a datetime (midnight for all-day events), or None
+        """
+        if self.start is None or isinstance(self.start, datetime):
+            return self.start
+        return datetime.combine(self.start, datetime.min.time())
+
+    @property
+    def sort_key(self):
+        """
+        Key that orders records by start, records without a start sort first
+        """
+        start = self.start_datetime
+        return (start is not None, start or datetime.min)
+
+    @property
+    def display_description(self):
+        """
+        Description parts worth showing, without repeats of the date and placeholder locations
+        """
+        return [part for part in self.description_parts
+                if part and not part.startswith(self.datetime_text) and part != 'No location']
+
+    def __repr__(self):
+        return f"EventRecord({self.datetime_text!r}, {self.summary!r})"
+
+def parse_iso(text, all_day=False):
+    """
+    Parses a stored ISO date or datetime, returning None for missing or unreadable values
+    """
+    if not text:
+        return None
+    try:
+        return date.fromisoformat(text) if all_day else datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+def to_records(events):
+    """
+    Converts stored event dicts to EventRecords
+    """
+    return [EventRecord.from_dict(event) for event in events]
+
+def filter_records(records, start=None, end=None):
+    """
+    Returns the records starting within [start, end), either bound may be None.
+    Records without a known start are only kept when no bounds are given.
+    """
+    if start is None and end is None:
+        return list(records)
+    selected = []
+    for record in records:
+        record_start = record.start_datetime
+        if record_start is None:
+            continue
+        if (start is None or record_start >= start) and (end is None or record_start < end):
+            selected.append(record)
+    return selected
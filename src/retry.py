@@ -0,0 +1,90 @@
+import logging
+import random
+import time
+from src import metrics
+
+logger = logging.getLogger('scraper')
+
+# Retry policy per operation: attempts in total, first backoff delay and the cap it doubles up to (seconds)
+policies = {
+    'heading': {'attempts': 3, 'delay': 0.5, 'max_delay': 4},
+    'extract': {'attempts': 3, 'delay': 0.5, 'max_delay': 4},
+    'navigate': {'attempts': 3, 'delay': 1, 'max_delay': 8},
+    'load': {'attempts': 3, 'delay': 2, 'max_delay': 16},
+}
+
+# How many times a walk may reload its month or restart a dead driver before giving up
+settings = {
+    'recoveries': 3,
+}
+
+# Error text of a Chrome driver that has crashed or lost its browser
+DEAD_DRIVER_MESSAGES = (
+    'invalid session id',
+    'chrome not reachable',
+    'disconnected',
+    'target window already closed',
+    'no such window',
+    'session deleted',
+    'connection refused',
+    'max retries exceeded',
+)
+
+def configure_retries(attempts=None, recoveries=None):
+    """
+    Overrides the number of attempts of every operation and the number of recoveries per walk
+    """
+    if attempts is not None:
+        for policy in policies.values():
+            policy['attempts'] = max(1, attempts)
+    if recoveries is not None:
+        settings['recoveries'] = recoveries
+
+def is_driver_dead(error):
+    """
+    Returns True if the error means the driver's browser is gone and only a new driver will help
+    """
+    if isinstance(error, (ConnectionError, EOFError)):
+        return True
+    if type(error).__name__ in ('InvalidSessionIdException', 'NoSuchWindowException', 'MaxRetryError'):
+        return True
+    message = str(error).lower()
+    return any(text in message for text in DEAD_DRIVER_MESSAGES)
+
+def record_retry(operation):
+    # Counted in the run metrics only, so metrics.reset() starts every run from zero
+    metrics.increment(f"retries {operation}")
+
+def backoff_delay(policy, attempt):
+    """
+    Returns the delay before retry number `attempt` (1-based): exponential, capped, with jitter
+    """
+    delay = min(policy['max_delay'], policy['delay'] * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+def with_retry(operation, function, *args, **kwargs):
+    """
+    Calls function(*args, **kwargs), retrying with exponential backoff under the operation's policy.
+    Errors from a dead driver are raised straight away, retrying them cannot succeed.
+    """
+    policy = policies[operation]
+    attempt = 1
+    while True:
+        try:
+            return function(*args, **kwargs)
+        except Exception as e:
+            if attempt >= policy['attempts'] or is_driver_dead(e):
+                raise
+            delay = backoff_delay(policy, attempt)
+            logger.debug(f"{operation} failed ({str(e).splitlines()[0] if str(e) else type(e).__name__}), "
+                         f"retrying in {delay:.1f}s")
+            record_retry(operation)
+            time.sleep(delay)
+            attempt += 1
+
+def summarize_retries():
+    """
+    Returns {operation: retries} for all operations that were retried in the current run
+    """
+    counters = metrics.snapshot()['counters']
+    return {name[8:]: count for name, count in counters.items() if name.startswith('retries_')}
@@ -1,37 +1,51 @@
 from selenium import webdriver
-import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
-import json
 import os
 import sys
 import time
 import logging
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import urlparse, parse_qs, urlencode, urlunparse
 import traceback
 import argparse
 from datetime import datetime, timedelta
 import signal
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
-from rich.panel import Panel
-from rich.text import Text
-from rich.logging import RichHandler
 from src.version import __version__
-import webbrowser  # Add to imports at top
 from src.generate_calendar import generate_calendar
+from src import metrics
+from src.browser import configure_browser, create_driver, quit_driver
+from src.dedup import EventIndex
+from src.delta import DeltaTracker
+from src.event_parser import parse_datetime_text, parse_event_label
+from src.ics import events_by_month, public_feed_url, read_feed
+from src.journal import EventJournal, compact_journal, load_previous_months, write_snapshot
+from src.manifest import latest_run_dir, record_run
+from src.readiness import (configure_waits, grid_fingerprint, settings as readiness_settings, summarize_waits,
+                           wait_for_agenda, wait_for_grid_ready, wait_for_month_change)
+from src.retry import configure_retries, is_driver_dead, settings as retry_settings, summarize_retries, with_retry
 
 # Initialize Rich console with color support
 console = Console(color_system="auto")
-logger = None  # Will be initialized in setup_logging
+logger = logging.getLogger('scraper')  # Handlers are added in setup_logging
 
 # Global variables for tracking state
 running = True
 current_driver = None
 collected_events = []
+collected_index = EventIndex()  # Hashes of collected_events, used to skip duplicates
 current_calendar_id = None
+current_run_dir = None
+current_journal = None
+event_store = None  # Optional SqliteStore written alongside the JSON snapshots
+view = 'month'  # 'month' walks one month view at a time, 'agenda' reads AGENDA_MONTHS months per page (-view)
 
 def signal_handler(signum, frame):
     """
@@ -80,17 +94,13 @@ def setup_logging(debug_mode=False):
     
     return logger
 
+@metrics.timed('driver_startup')
 def setup_driver():
     """
-    Sets up and returns undetected Chrome driver
+    Sets up and returns a headless Chrome driver (undetected_chromedriver unless -backend chrome is used)
     """
     try:
-        options = uc.ChromeOptions()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        driver = uc.Chrome(options=options)
+        driver = create_driver()
         driver.implicitly_wait(10)
         return driver
         
@@ -119,6 +129,42 @@ def extract_calendar_id(url):
         logger.error(f"Error extracting calendar ID: {str(e)}")
         raise
 
+def calendar_timezone(url):
+    """
+    Returns the time zone the calendar URL displays events in (its ctz parameter), or None
+    """
+    if not url:
+        return None
+    return parse_qs(urlparse(url).query).get('ctz', [None])[0]
+
+def months_before(date, months):
+    """
+    Returns the first day of the month that is `months` months before `date`
+    """
+    total = date.year * 12 + (date.month - 1) - months
+    return datetime(total // 12, total % 12 + 1, 1)
+
+def build_month_url(url, month_date):
+    """
+    Returns the calendar URL pointed at the month containing month_date
+    """
+    parsed_url = urlparse(url)
+    query_params = parse_qs(parsed_url.query)
+    day = month_date.strftime('%Y%m01')
+    query_params['dates'] = [f"{day}/{day}"]
+    query_params['mode'] = ['MONTH']
+    return urlunparse(parsed_url._replace(query=urlencode(query_params, doseq=True)))
+
+def build_agenda_url(url, first_month, last_month):
+    """
+    Returns the calendar URL showing the agenda from first_month to the end of last_month
+    """
+    parsed_url = urlparse(url)
+    query_params = parse_qs(parsed_url.query)
+    query_params['dates'] = [f"{first_month.strftime('%Y%m01')}/{months_before(last_month, -1).strftime('%Y%m01')}"]
+    query_params['mode'] = ['AGENDA']
+    return urlunparse(parsed_url._replace(query=urlencode(query_params, doseq=True)))
+
 def create_calendar_directory(calendar_id):
     """
     Creates directory structure for storing calendar data
@@ -128,12 +174,14 @@ def create_calendar_directory(calendar_id):
         base_dir = os.path.join(os.getcwd(), 'calendars', calendar_id, timestamp)
         logger.debug(f"Creating directory: {base_dir}")
         os.makedirs(base_dir, exist_ok=True)
+        record_run(base_dir, calendar_id)
         return base_dir
     
     except Exception as e:
         logger.error(f"Error creating directory: {str(e)}")
         raise
 
+@metrics.timed('calendar_load')
 def wait_for_calendar_load(driver):
     """
     Waits for calendar to load and returns True if successful
@@ -174,116 +222,256 @@ def wait_for_calendar_load(driver):
         logger.error(f"Error waiting for calendar: {str(e)}")
         return False
 
-def parse_month_events(soup):
+def load_month(driver, url, month_date):
     """
-    Parses events from the current month view with standardized datetime format
+    Loads the calendar URL directly at the month containing month_date
+    """
+    logger.debug(f"Loading calendar at {month_date.strftime('%B %Y')}")
+    with metrics.timed('page_load'):
+        driver.get(build_month_url(url, month_date))
+    if not wait_for_calendar_load(driver):
+        raise Exception(f"Calendar failed to load for {month_date.strftime('%B %Y')}")
+    wait_for_initial_render(driver)
+
+def wait_for_initial_render(driver):
+    """
+    Waits for the first month view to finish rendering, continuing anyway on timeout
+    """
+    try:
+        wait_for_grid_ready(driver)
+    except TimeoutError as e:
+        logger.warning(f"{str(e)}, continuing anyway")
+
+def print_wait_summary():
+    """
+    Prints how long the scraper spent waiting for the page, and how often operations were retried
+    """
+    summary = summarize_waits()
+    for kind, stats in summary.items():
+        logger.debug(f"Wait times for {kind}: {stats}")
+        console.print(f"[dim]Waited for {kind} {stats['count']} times: "
+                      f"mean {stats['mean']:.2f}s, max {stats['max']:.2f}s, total {stats['total']:.1f}s[/]")
+    
+    retries = summarize_retries()
+    if retries:
+        counts = ", ".join(f"{operation} {count}" for operation, count in retries.items())
+        console.print(f"[dim]Retries: {counts}[/]")
+
+def save_metrics(run_dir, calendar_id, prometheus_path=None):
+    """
+    Writes the run's phase timings and counters to calendar_metrics.json, and optionally a Prometheus text dump
+    """
+    try:
+        metrics_path = metrics.write_metrics(run_dir, calendar_id)
+        logger.debug(f"Metrics written to {metrics_path}")
+        if prometheus_path:
+            metrics.write_prometheus(prometheus_path, {'calendar_id': calendar_id})
+            console.print(f"[dim]Prometheus metrics written to {prometheus_path}[/]")
+    except Exception as e:
+        logger.warning(f"Could not write metrics: {str(e)}")
+
+# Returns [label, details] text pairs for every event in the visible view
+EXTRACT_EVENTS_SCRIPT = """
+var labels = [];
+var elements = document.querySelectorAll("div.KF4T6b[role='button']");
+for (var i = 0; i < elements.length; i++) {
+    var info = elements[i].querySelector("span.XuJrye");
+    if (!info) {
+        continue;
+    }
+    var details = elements[i].querySelector("span.WBi6vc");
+    labels.push([info.textContent.trim(), details ? details.textContent.trim() : ""]);
+}
+return labels;
+"""
+
+# Returns [label, details] text pairs for every entry in the agenda list
+EXTRACT_AGENDA_SCRIPT = """
+var labels = [];
+var spans = document.querySelectorAll("[role='button'] span.XuJrye");
+for (var i = 0; i < spans.length; i++) {
+    var details = spans[i].closest("[role='button']").querySelector("span.WBi6vc");
+    labels.push([spans[i].textContent.trim(), details ? details.textContent.trim() : ""]);
+}
+return labels;
+"""
+
+# Scrolls the last agenda entry into view, so the list loads the next entries, and returns the entry count
+SCROLL_AGENDA_SCRIPT = """
+var spans = document.querySelectorAll("[role='button'] span.XuJrye");
+if (spans.length) {
+    spans[spans.length - 1].scrollIntoView();
+}
+return spans.length;
+"""
+
+# Months of events read from one agenda page with -view agenda
+AGENDA_MONTHS = 12
+# Upper bound on scrolls per agenda page, in case the list never stops growing
+AGENDA_MAX_SCROLLS = 200
+
+@metrics.timed('parse')
+def parse_event_labels(labels, timezone=None):
+    """
+    Parses events from (label, details) text pairs with standardized datetime format
+    timezone: name of the time zone the calendar is displayed in, stored with each event
     """
     events = []
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for event_text, details_text in labels:
+        try:
+            event = parse_event_label(event_text, details_text, timezone)
+            if event is None:
+                if debug:
+                    logger.debug("Skipping event with insufficient parts: %s", event_text)
+                continue
+            
+            events.append(event)
+            if debug:
+                logger.debug("Parsed event: %s on %s", event['summary'], event['datetime'])
+            
+        except Exception as e:
+            logger.warning(f"Could not parse an event completely: {e}")
+            continue
+    
+    return events
+
+def parse_month_events(soup, timezone=None):
+    """
+    Parses events from the current month view with standardized datetime format
+    """
+    labels = []
     try:
         event_elements = soup.find_all('div', {'role': 'button', 'class': 'KF4T6b'})
         logger.debug(f"Found {len(event_elements)} potential event elements")
         
         for event in event_elements:
-            try:
-                event_info = event.find('span', class_='XuJrye')
-                if not event_info:
-                    continue
-                    
-                event_text = event_info.text.strip()
-                parts = event_text.split(', ')
-                if len(parts) < 3:
-                    logger.debug(f"Skipping event with insufficient parts: {event_text}")
-                    continue
-                
-                # Initialize event details
-                time_str = parts[0]
-                title = parts[1]
-                date_str = parts[-1]
-                location = ''
-                description = []
-                
-                # Extract details and location
-                details_span = event.find('span', class_='WBi6vc')
-                if details_span:
-                    description.append(details_span.text.strip())
-                
-                for part in parts:
-                    if part.startswith('Location: '):
-                        location = part.replace('Location: ', '').strip()
-                    elif ('Calendar:' not in part and 
-                          part != title and 
-                          not any(month in part for month in [
-                              'January', 'February', 'March', 'April', 'May', 'June',
-                              'July', 'August', 'September', 'October', 'November', 'December'
-                          ])):
-                        if part not in description:
-                            description.append(part)
-                
-                events.append({
-                    'datetime': f"{date_str} {time_str}",
-                    'summary': title.strip(),
-                    'description': ' | '.join(filter(None, description)),
-                    'location': location,
-                    'attendees': []
-                })
-                logger.debug(f"Parsed event: {title} on {date_str} {time_str}")
-                
-            except Exception as e:
-                logger.warning(f"Could not parse an event completely: {e}")
+            event_info = event.find('span', class_='XuJrye')
+            if not event_info:
                 continue
+            details_span = event.find('span', class_='WBi6vc')
+            labels.append((event_info.text.strip(), details_span.text.strip() if details_span else ''))
                 
     except Exception as e:
         logger.error(f"Error parsing month events: {e}")
     
-    return events
+    return parse_event_labels(labels, timezone)
+
+def extract_month_events(driver, timezone=None):
+    """
+    Extracts events from the current month view.
+    Runs a script in the page that returns only the event label text, falling back
+    to parsing the full page source with BeautifulSoup if the script fails.
+    """
+    try:
+        with metrics.timed('extract_script'):
+            labels = driver.execute_script(EXTRACT_EVENTS_SCRIPT)
+        if isinstance(labels, list):
+            return parse_event_labels(labels, timezone)
+        logger.debug(f"Event extraction script returned {type(labels).__name__}, falling back to page source")
+    except Exception as e:
+        logger.debug(f"Event extraction script failed, falling back to page source: {str(e)}")
+    
+    metrics.increment('page_source_fallbacks')
+    with metrics.timed('page_source'):
+        soup = BeautifulSoup(driver.page_source, 'html.parser')
+    return parse_month_events(soup, timezone)
+
+def load_agenda(driver, url, first_month, last_month):
+    """
+    Loads the agenda from first_month to the end of last_month and scrolls it until every entry is loaded
+    """
+    logger.debug(f"Loading agenda from {first_month.strftime('%B %Y')} to {last_month.strftime('%B %Y')}")
+    with metrics.timed('page_load'):
+        driver.get(build_agenda_url(url, first_month, last_month))
+    if not wait_for_calendar_load(driver):
+        raise Exception(f"Agenda failed to load for {first_month.strftime('%B %Y')}")
+    
+    # An empty range never shows an entry, so give up on growth quickly rather than waiting out the timeout
+    growth_timeout = max(2, 4 * readiness_settings['settle'])
+    count = 0
+    for _ in range(AGENDA_MAX_SCROLLS):
+        try:
+            wait_for_agenda(driver, count, timeout=growth_timeout)
+        except TimeoutError:
+            break
+        with metrics.timed('agenda_scroll'):
+            count = driver.execute_script(SCROLL_AGENDA_SCRIPT)
+    metrics.increment('agenda_pages')
+    logger.debug(f"Agenda shows {count} entries")
+
+def extract_agenda_events(driver, timezone=None):
+    """
+    Extracts the events of the loaded agenda. Raises if the page did not return a list.
+    """
+    with metrics.timed('extract_script'):
+        labels = driver.execute_script(EXTRACT_AGENDA_SCRIPT)
+    if not isinstance(labels, list):
+        raise Exception(f"Agenda extraction script returned {type(labels).__name__}")
+    return parse_event_labels(labels, timezone)
+
+def event_month(event):
+    """
+    Returns the 'YYYY-MM' an event starts in, or None if its date cannot be read
+    """
+    start = event.get('start') or parse_datetime_text(event.get('datetime'))[0]
+    return start[:7] if start else None
 
+@metrics.timed('save')
 def save_progress(events, calendar_id, final=False):
     """
-    Saves current progress to a JSON file
+    Saves current progress to a JSON file in the current run directory.
+    If the run has a journal, the snapshot is compacted from it, otherwise events are written directly.
+    With -sqlite the same snapshot is also written to the event store.
     """
+    global current_run_dir
+    
     if not events:
         return
         
+    status = 'final' if final else 'partial'
     try:
-        # Create base directory for this calendar
-        base_dir = os.path.join(os.getcwd(), 'calendars', calendar_id)
-        if not os.path.exists(base_dir):
-            os.makedirs(base_dir, exist_ok=True)
-            
-        # Create timestamp directory
-        timestamp = time.strftime('%Y%m%d_%H%M%S')
-        timestamp_dir = os.path.join(base_dir, timestamp)
-        os.makedirs(timestamp_dir, exist_ok=True)
-        
-        # Save to the timestamp directory
-        status = 'final' if final else 'partial'
-        json_path = os.path.join(timestamp_dir, f'calendar_data_{status}.json')
-        
-        data = {
-            'calendar_id': calendar_id,
-            'scrape_timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
-            'scrape_status': status,
-            'events': events
-        }
+        if current_journal and current_journal.calendar_id == calendar_id:
+            json_path, events = compact_journal(current_journal.run_dir, calendar_id, final)
+        else:
+            if not current_run_dir:
+                current_run_dir = create_calendar_directory(calendar_id)
+            json_path = write_snapshot(current_run_dir, calendar_id, events, status)
+        event_count = len(events)
         
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        # A partial save after the run's final one must not replace the final snapshot in the store
+        final_path = os.path.join(os.path.dirname(json_path), 'calendar_data_final.json')
+        if event_store and (final or not os.path.exists(final_path)):
+            event_store.write_snapshot(calendar_id, events, status)
         
         if not final:
-            console.print(f"\nProgress saved: [green]{len(events)} events[/] written to [blue]{json_path}[/]")
+            console.print(f"\nProgress saved: [green]{event_count} events[/] written to [blue]{json_path}[/]")
     
     except Exception as e:
         logger.error(f"Error saving progress: {str(e)}")
 
+def open_run_journal(calendar_id):
+    """
+    Creates the run directory for this scrape and opens its event journal
+    """
+    global current_journal, current_run_dir
+    
+    current_run_dir = create_calendar_directory(calendar_id)
+    current_journal = EventJournal(calendar_id, current_run_dir)
+    logger.debug(f"Journaling events to {current_journal.path}")
+    return current_journal
+
 def cleanup():
     """
     Performs cleanup operations before shutdown
     """
-    global current_driver, collected_events, current_calendar_id
+    global current_driver, collected_events, current_calendar_id, event_store
     
     if collected_events and current_calendar_id:
-        print("\nSaving collected events before shutdown...")
-        save_progress(collected_events, current_calendar_id)
+        # A finished run was compacted by fetch_calendar_data, compacting it again would only rewrite it
+        if not (current_run_dir and os.path.exists(os.path.join(current_run_dir, 'calendar_data_final.json'))):
+            print("\nSaving collected events before shutdown...")
+            save_progress(collected_events, current_calendar_id)
         
         # Generate HTML using available data (partial or final)
         try:
@@ -291,14 +479,14 @@ def cleanup():
             
             # Open the generated HTML file in default browser
             try:
+                import webbrowser
                 webbrowser.open('file://' + os.path.abspath(html_path))
                 console.print("[green]Opening calendar in your default browser...[/]")
             except Exception as e:
                 logger.error(f"Could not open browser: {str(e)}")
             
             # Only remove partial file if we have a successful final save
-            base_dir = os.path.join(os.getcwd(), 'calendars', current_calendar_id)
-            latest_dir = max([os.path.join(base_dir, d) for d in os.listdir(base_dir)], key=os.path.getmtime)
+            latest_dir = current_run_dir or latest_run_dir(current_calendar_id)
             final_file = os.path.join(latest_dir, 'calendar_data_final.json')
             partial_file = os.path.join(latest_dir, 'calendar_data_partial.json')
             
@@ -310,7 +498,7 @@ def cleanup():
     if current_driver:
         print("Closing browser...")
         try:
-            current_driver.quit()
+            quit_driver(current_driver)
         except OSError as e:
             if "[WinError 6] The handle is invalid" not in str(e):
                 logger.error(f"Error during driver cleanup: {str(e)}")
@@ -318,114 +506,752 @@ def cleanup():
             logger.error(f"Error during driver cleanup: {str(e)}")
         current_driver = None
     
+    if event_store:
+        event_store.close()
+        event_store = None
+    
     console.print("[green]Cleanup complete. Thanks for using calspy![/]")
 
-def scrape_direction(driver, max_empty_months=18, target_months=None):
+def read_month_heading(driver):
+    """
+    Returns the heading of the month the driver is showing, e.g. 'March 2024'
+    """
+    current_month = None
+    error = None
+    try:
+        month_element = driver.find_element(By.CLASS_NAME, "UyW9db")
+        current_month = month_element.text
+    except Exception as e:
+        error = e
+    
+    if not current_month:
+        try:
+            month_element = driver.find_element(By.CSS_SELECTOR, "[role='heading'][class*='month']")
+            current_month = month_element.text
+        except:
+            pass
+    
+    if not current_month:
+        try:
+            month_element = driver.find_element(By.CSS_SELECTOR, "[aria-label*='February'], [aria-label*='March']")
+            current_month = month_element.get_attribute('aria-label').split(',')[0]
+        except:
+            pass
+    
+    if not current_month:
+        # A dead driver fails every lookup, let the caller see that rather than a missing element
+        if error is not None and is_driver_dead(error):
+            raise error
+        raise Exception("Could not find month element using any method")
+    return current_month
+
+def go_to_previous_month(driver, left=None):
+    """
+    Clicks Previous and waits for the previous month to render.
+    left: fingerprint of the month being left. When retried after a timeout, Previous is not clicked again
+          if the view has moved on from that month since, so a late render never skips a month.
+    Returns False if the button is disabled (the beginning of the calendar).
+    Raises TimeoutError if the month does not change, the caller reloads it rather than read a stale view.
+    """
+    before_click = grid_fingerprint(driver)
+    if left and left[0] and before_click and before_click[0] != left[0]:
+        logger.debug(f"View already moved on from {left[0]}, waiting for it to settle")
+        with metrics.timed('navigation'):
+            wait_for_month_change(driver, left)
+        return True
+    
+    prev_button = driver.find_element(By.CSS_SELECTOR, "button[aria-label*='Previous']")
+    if not prev_button.is_enabled():
+        return False
+    
+    with metrics.timed('navigation'):
+        prev_button.click()
+        wait_for_month_change(driver, before_click)
+    return True
+
+# One month read by walk_months
+ScrapedMonth = namedtuple('ScrapedMonth', [
+    'month',       # 'YYYY-MM'
+    'heading',     # Month heading as shown, e.g. 'March 2024'
+    'offset',      # Months before start_date
+    'events',      # Every event in the month view
+    'new_events',  # Events not already yielded for an earlier month (adjacent month views overlap)
+])
+
+class WalkState:
+    """
+    What walk_months and walk_agenda track between months: the events already yielded, the runs of
+    consecutive empty and unchanged months, and the months to skip, with the stop conditions they lead to
+    """
+    
+    def __init__(self, start_date, max_empty_months=18, target_months=None, skip_months=None, delta=None):
+        self.start_date = start_date
+        self.max_empty_months = max_empty_months
+        self.target_months = target_months
+        self.skip_months = skip_months or {}
+        self.delta = delta
+        self.seen_events = EventIndex()
+        self.empty_months = 0
+        self.unchanged_months = 0
+    
+    def next_month_to_scrape(self, offset):
+        """
+        Returns the first offset from `offset` on that is not already captured, or None if
+        the stop conditions are met before reaching one
+        """
+        while True:
+            if self.target_months is not None and offset > self.target_months:
+                return None
+            month_key = months_before(self.start_date, offset).strftime('%Y-%m')
+            if month_key not in self.skip_months:
+                return offset
+            if self.target_months is None:
+                if self.skip_months[month_key]:
+                    self.empty_months = 0
+                else:
+                    self.empty_months += 1
+                    if self.empty_months >= self.max_empty_months:
+                        return None
+            offset += 1
+    
+    def scraped_month(self, offset, heading, month_events):
+        """
+        Counts a scraped month towards the metrics and stop conditions and returns its ScrapedMonth
+        """
+        month_key = months_before(self.start_date, offset).strftime('%Y-%m')
+        metrics.increment('months')
+        metrics.increment('events', len(month_events))
+        if not month_events:
+            metrics.increment('empty_months')
+        
+        # Empty months only stop the walk if there is no target
+        if self.target_months is None:
+            if not month_events:
+                self.empty_months += 1
+                logger.debug(f"No events found in {heading}. Empty month count: {self.empty_months}")
+            else:
+                self.empty_months = 0
+        
+        if self.delta:
+            if self.delta.record_month(month_key, month_events):
+                self.unchanged_months += 1
+            else:
+                self.unchanged_months = 0
+        
+        new_events = self.seen_events.add(month_events)
+        metrics.increment('duplicate_events', len(month_events) - len(new_events))
+        return ScrapedMonth(month_key, heading, offset, month_events, new_events)
+    
+    def should_stop(self, offset):
+        """
+        Returns True (and says why) if the walk stops after the month at offset
+        """
+        if self.target_months is not None and offset >= self.target_months:
+            console.print(f"\n[yellow]Reached target of {self.target_months} months. Stopping scrape.[/]")
+        elif self.target_months is None and self.empty_months >= self.max_empty_months:
+            console.print(f"\n[yellow]Found {self.empty_months} consecutive empty months. Stopping scrape.[/]")
+        elif self.delta and self.delta.stop_after and self.unchanged_months >= self.delta.stop_after:
+            console.print(f"\n[yellow]No changes in {self.unchanged_months} consecutive months. Stopping scrape.[/]")
+        else:
+            return False
+        return True
+
+def walk_months(driver, max_empty_months=18, target_months=None, start_date=None, url=None, skip_months=None,
+                delta=None, should_continue=None, restart_driver=None):
+    """
+    Walks the calendar backwards from the month the driver is showing, yielding a ScrapedMonth as soon as
+    each month is parsed. Nothing is kept between months apart from the hashes used to drop overlapping events.
+    start_date: month the driver is currently showing (defaults to now)
+    url: calendar URL, used to jump over runs of already captured months
+    skip_months: {'YYYY-MM': event count} of months already captured, these are not scraped again
+    delta: DeltaTracker each month is compared against, walking stops after delta.stop_after unchanged months
+    should_continue: called before each month, the walk stops when it returns False (defaults to the Ctrl+C flag)
+    restart_driver: called to replace a driver that died, returns the new driver. Without it (or a url) the walk
+                    stops at a dead driver, otherwise it reloads the month it was on and carries on.
+    """
+    months_traversed = 0
+    recoveries = 0
+    start_date = start_date or datetime.now()
+    state = WalkState(start_date, max_empty_months, target_months, skip_months if url else None, delta)
+    timezone = calendar_timezone(url)
+    should_continue = should_continue or (lambda: running)
+    
+    def recover(offset, error):
+        """
+        Reloads the month at offset after an error, in a new driver if the old one died.
+        Returns False if the walk cannot continue.
+        """
+        nonlocal driver
+        if not url or recoveries > retry_settings['recoveries']:
+            return False
+        try:
+            if is_driver_dead(error):
+                if not restart_driver:
+                    return False
+                logger.warning("Chrome driver stopped responding, starting a new one")
+                metrics.increment('driver_restarts')
+                driver = restart_driver()
+            logger.warning(f"Reloading the calendar at {months_before(start_date, offset).strftime('%B %Y')}")
+            metrics.increment('recoveries')
+            with_retry('load', load_month, driver, url, months_before(start_date, offset))
+            return True
+        except Exception as e:
+            logger.error(f"Could not recover: {str(e)}")
+            return False
+    
+    first_offset = state.next_month_to_scrape(0)
+    if first_offset is None:
+        console.print("\n[yellow]All months in range are already captured[/]")
+        return
+    if first_offset > 0:
+        logger.debug(f"Skipping {first_offset} already captured months")
+        metrics.increment('skipped_months', first_offset)
+        with_retry('load', load_month, driver, url, months_before(start_date, first_offset))
+        months_traversed = first_offset
+    
+    while should_continue():
+        yielded = False
+        try:
+            current_month = with_retry('heading', read_month_heading, driver)
+            month_events = with_retry('extract', extract_month_events, driver, timezone)
+            yield state.scraped_month(months_traversed, current_month, month_events)
+            yielded = True
+            recoveries = 0
+            
+            if state.should_stop(months_traversed):
+                break
+            
+            # Jump over months that are already captured
+            next_offset = state.next_month_to_scrape(months_traversed + 1)
+            if next_offset is None:
+                console.print("\n[yellow]Remaining months are already captured. Stopping scrape.[/]")
+                break
+            if next_offset > months_traversed + 1:
+                logger.debug(f"Skipping {next_offset - months_traversed - 1} already captured months")
+                metrics.increment('skipped_months', next_offset - months_traversed - 1)
+                months_traversed = next_offset
+                yielded = False
+                with_retry('load', load_month, driver, url, months_before(start_date, next_offset))
+                continue
+            
+            # Try to navigate backward, a month that does not render is reloaded by recover()
+            if not with_retry('navigate', go_to_previous_month, driver, grid_fingerprint(driver)):
+                console.print("\n[yellow]Reached the beginning of available calendar data[/]")
+                break
+            months_traversed += 1
+            
+        except Exception as e:
+            logger.error(f"Error during scraping: {str(e)}")
+            metrics.increment('scrape_errors')
+            
+            # Resume at the month that failed, or the next one if it was already passed on
+            resume_offset = state.next_month_to_scrape(months_traversed + 1) if yielded else months_traversed
+            if resume_offset is None:
+                break
+            recoveries += 1
+            if not recover(resume_offset, e):
+                # The months from resume_offset on were never read, the caller must not take the walk as complete
+                raise
+            months_traversed = resume_offset
+
+def walk_agenda(driver, max_empty_months=18, target_months=None, start_date=None, url=None, skip_months=None,
+                delta=None, should_continue=None, restart_driver=None, span_months=AGENDA_MONTHS):
+    """
+    Walks the calendar backwards like walk_months, but reads up to span_months months from one agenda page
+    instead of navigating month by month. Events are grouped by the month they start in and yielded as the
+    same ScrapedMonth records, newest month first.
+    If an agenda page cannot be read, the rest of the calendar is walked with walk_months.
+    Takes the same arguments as walk_months, url is required.
+    """
+    recoveries = 0
+    start_date = start_date or datetime.now()
+    skip_months = skip_months or {}
+    state = WalkState(start_date, max_empty_months, target_months, skip_months, delta)
+    timezone = calendar_timezone(url)
+    should_continue = should_continue or (lambda: running)
+    
+    offset = state.next_month_to_scrape(0)
+    if offset is None:
+        console.print("\n[yellow]All months in range are already captured[/]")
+        return
+    if offset > 0:
+        logger.debug(f"Skipping {offset} already captured months")
+        metrics.increment('skipped_months', offset)
+    
+    while should_continue():
+        # The page covers the months from offset back to the next captured month, the target or span_months
+        last_offset = offset
+        while last_offset - offset + 1 < span_months:
+            if target_months is not None and last_offset + 1 > target_months:
+                break
+            if months_before(start_date, last_offset + 1).strftime('%Y-%m') in skip_months:
+                break
+            last_offset += 1
+        
+        try:
+            with_retry('load', load_agenda, driver, url, months_before(start_date, last_offset),
+                       months_before(start_date, offset))
+            page_events = with_retry('extract', extract_agenda_events, driver, timezone)
+        except Exception as e:
+            logger.error(f"Error reading the agenda: {str(e)}")
+            metrics.increment('scrape_errors')
+            recoveries += 1
+            if is_driver_dead(e) and restart_driver and recoveries <= retry_settings['recoveries']:
+                logger.warning("Chrome driver stopped responding, starting a new one")
+                metrics.increment('driver_restarts')
+                driver = restart_driver()
+                continue
+            
+            # Fall back to walking month views from the month that failed
+            logger.warning(f"Falling back to month views at {months_before(start_date, offset).strftime('%B %Y')}")
+            metrics.increment('agenda_fallbacks')
+            try:
+                with_retry('load', load_month, driver, url, months_before(start_date, offset))
+            except Exception as e:
+                logger.error(f"Could not load the month view: {str(e)}")
+                raise
+            remaining = None if target_months is None else target_months - offset
+            for scraped in walk_months(driver, max_empty_months, remaining, months_before(start_date, offset), url,
+                                       skip_months, delta, should_continue, restart_driver):
+                yield scraped._replace(offset=scraped.offset + offset)
+            return
+        recoveries = 0
+        
+        # Group the page's events by month, events starting before the range belong to its oldest month
+        oldest_key = months_before(start_date, last_offset).strftime('%Y-%m')
+        newest_key = months_before(start_date, offset).strftime('%Y-%m')
+        events_by_key = {}
+        for event in page_events:
+            month_key = min(max(event_month(event) or newest_key, oldest_key), newest_key)
+            events_by_key.setdefault(month_key, []).append(event)
+        
+        for month_offset in range(offset, last_offset + 1):
+            month_date = months_before(start_date, month_offset)
+            yield state.scraped_month(month_offset, month_date.strftime('%B %Y'),
+                                      events_by_key.get(month_date.strftime('%Y-%m'), []))
+            if state.should_stop(month_offset) or not should_continue():
+                return
+        
+        # Jump over months that are already captured
+        next_offset = state.next_month_to_scrape(last_offset + 1)
+        if next_offset is None:
+            console.print("\n[yellow]Remaining months are already captured. Stopping scrape.[/]")
+            return
+        if next_offset > last_offset + 1:
+            logger.debug(f"Skipping {next_offset - last_offset - 1} already captured months")
+            metrics.increment('skipped_months', next_offset - last_offset - 1)
+        offset = next_offset
+
+def month_walker(url, view_name=None):
+    """
+    Returns the walk function for a view ('month' or 'agenda', defaults to the -view setting).
+    The agenda is loaded by URL, so without one the month walker is used.
+    """
+    if (view_name or view) == 'agenda' and url:
+        return walk_agenda
+    return walk_months
+
+def scrape_direction(driver, max_empty_months=18, target_months=None, start_date=None,
+                     progress=None, collect=True, journal=None, url=None, skip_months=None, delta=None,
+                     label=None, on_month=None, keep_events=True, restart_driver=None, view_name=None):
     """
     Scrapes calendar in one direction (backwards)
+    start_date: month the driver is currently showing (defaults to now)
+    progress: shared Rich progress to report into, a new one is created if None
+    collect: if True, events are also appended to the global collected_events
+    journal: EventJournal each month is appended to as soon as it is parsed
+    url: calendar URL, used to jump over runs of already captured months
+    skip_months: {'YYYY-MM': event count} of months already captured, these are not scraped again
+    delta: DeltaTracker each month is compared against, scraping stops after delta.stop_after unchanged months
+    label: prefix for the progress description, used when several scrapes share one progress
+    on_month: called with each ScrapedMonth once it is journaled
+    keep_events: if False, events are only passed on (journal, collected_events, on_month) and an empty list
+                 is returned, so long backfills are not held in memory twice
+    restart_driver: called to replace the driver if it dies, see walk_months
+    view_name: 'month' or 'agenda', see month_walker
+    Returns the new events of every month, newest first
     """
     events = []
-    months_traversed = 0
-    empty_months_count = 0
-    start_date = datetime.now()
+    event_count = 0
     
-    with Progress(
+    progress_context = nullcontext(progress) if progress else Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
         BarColumn(),
         TaskProgressColumn(),
         console=console
-    ) as progress:
+    )
+    
+    with progress_context as progress:
         scrape_task = progress.add_task(
             "Scraping calendar...",
-            total=target_months if target_months else None
+            total=target_months
         )
         
-        while running:
-            try:
-                # Get current month first
-                current_month = None
-                try:
-                    month_element = driver.find_element(By.CLASS_NAME, "UyW9db")
-                    current_month = month_element.text
-                except:
-                    pass
-                
-                if not current_month:
-                    try:
-                        month_element = driver.find_element(By.CSS_SELECTOR, "[role='heading'][class*='month']")
-                        current_month = month_element.text
-                    except:
-                        pass
-                
-                if not current_month:
-                    try:
-                        month_element = driver.find_element(By.CSS_SELECTOR, "[aria-label*='February'], [aria-label*='March']")
-                        current_month = month_element.get_attribute('aria-label').split(',')[0]
-                    except:
-                        pass
-                
-                if not current_month:
-                    raise Exception("Could not find month element using any method")
-                
-                # Calculate date and parse events
-                click_date = start_date - timedelta(days=30.44 * months_traversed)
-                soup = BeautifulSoup(driver.page_source, 'html.parser')
-                month_events = parse_month_events(soup)
-                
-                # Update empty months counter (only if not using target_months)
-                if not target_months:
-                    if not month_events:
-                        empty_months_count += 1
-                        logger.debug(f"No events found in {current_month}. Empty month count: {empty_months_count}")
-                    else:
-                        empty_months_count = 0
-                
-                events.extend(month_events)
-                collected_events.extend(month_events)
-                
-                # Update progress description
-                progress.update(
-                    scrape_task,
-                    description=f"[cyan]{click_date.strftime('%B %Y')}[/] | [yellow]{current_month}[/] | "
-                              f"Months: {months_traversed} | "
-                              f"Events: {len(events)}"
-                )
-                
-                # Check stop conditions
-                if target_months and months_traversed >= target_months:
-                    console.print(f"\n[yellow]Reached target of {target_months} months. Stopping scrape.[/]")
+        walk = month_walker(url, view_name)
+        for scraped in walk(driver, max_empty_months, target_months, start_date, url, skip_months, delta,
+                            restart_driver=restart_driver):
+            if journal:
+                journal.append_month(scraped.month, scraped.heading, scraped.events)
+            
+            event_count += len(scraped.new_events)
+            if keep_events:
+                events.extend(scraped.new_events)
+            if collect:
+                collected_events.extend(collected_index.add(scraped.new_events))
+            if on_month:
+                on_month(scraped)
+            
+            # Update progress description
+            progress.update(
+                scrape_task,
+                completed=scraped.offset,
+                description=f"{label + ' | ' if label else ''}"
+                          f"[cyan]{datetime.strptime(scraped.month, '%Y-%m').strftime('%B %Y')}[/] | "
+                          f"[yellow]{scraped.heading}[/] | "
+                          f"Months: {scraped.offset} | "
+                          f"Events: {event_count}"
+            )
+    
+    return events
+
+# Times a chunk of the worker pool is attempted before the scrape is given up as incomplete
+CHUNK_ATTEMPTS = 2
+
+def scrape_pool(url, workers, max_empty_months=18, target_months=None, chunk_months=12, journal=None,
+                skip_months=None):
+    """
+    Scrapes the calendar with a pool of Chrome drivers.
+    The history is split into chunks of chunk_months months, newest first. Each worker
+    loads the calendar at the start of a chunk and walks it backwards, claiming the next
+    unscraped chunk when done. Results are merged into collected_events in the same
+    order a single driver would have produced them, stopping after max_empty_months
+    consecutive empty months like a single driver does.
+    A chunk that fails, or whose walk gives up part way, is handed out again, up to CHUNK_ATTEMPTS times.
+    If a chunk still could not be scraped, the events of the other chunks are collected and an exception
+    is raised, so the run is not saved as complete.
+    Chunks are journaled in order once every earlier chunk is in, so months past the empty months are
+    never journaled.
+    """
+    start_date = datetime.now()
+    skip_months = skip_months or {}
+    total_months = target_months + 1 if target_months is not None else None
+    lock = threading.Lock()
+    results = {}
+    pending = {}  # Chunk index: ScrapedMonths not journaled yet
+    empty_months = {}  # Chunk index: [True for each empty month of the chunk, newest first]
+    attempts = {}
+    failed = set()
+    state = {'next_index': 0, 'stop_index': None, 'stop_month': None, 'retry': [], 'journaled': 0}
+    
+    def chunk_range(index):
+        offset = index * chunk_months
+        length = chunk_months if total_months is None else min(chunk_months, total_months - offset)
+        return index, offset, length
+    
+    def claim_chunk():
+        with lock:
+            stop_index = state['stop_index']
+            while state['retry']:
+                index = state['retry'].pop(0)
+                if stop_index is None or index < stop_index:
+                    return chunk_range(index)
+            index = state['next_index']
+            if stop_index is not None and index >= stop_index:
+                return None
+            if total_months is not None and index * chunk_months >= total_months:
+                return None
+            state['next_index'] += 1
+            return chunk_range(index)
+    
+    def fail_chunk(index, error):
+        with lock:
+            attempts[index] = attempts.get(index, 0) + 1
+            if attempts[index] < CHUNK_ATTEMPTS:
+                logger.warning(f"Chunk {index} failed, handing it out again: {str(error)}")
+                state['retry'].append(index)
+            else:
+                logger.error(f"Chunk {index} failed {attempts[index]} times, giving up on it: {str(error)}")
+                failed.add(index)
+        metrics.increment('chunk_failures')
+    
+    def before_stop(index):
+        """
+        Returns True if the chunk is not past the empty months (the chunk they end in counts as before)
+        """
+        return state['stop_index'] is None or index < state['stop_index']
+    
+    def kept_months(index, months):
+        """
+        Returns the chunk's months that are part of the scrape, those past the empty months are dropped
+        """
+        if index == (state['stop_index'] or 0) - 1:
+            return [scraped for scraped in months if scraped.month >= state['stop_month']]
+        return months
+    
+    def journal_chunks(through=None):
+        """
+        Journals the pending chunks in order, stopping at the first chunk that is not in yet
+        (or at `through`, skipping the missing ones) and at the empty months
+        """
+        index = state['journaled']
+        while before_stop(index) and (index in results or (through is not None and index < through)):
+            for scraped in kept_months(index, pending.pop(index, [])):
+                journal.append_month(scraped.month, scraped.heading, scraped.events)
+            index += 1
+        state['journaled'] = index
+    
+    def find_stop():
+        # Stop handing out chunks once enough consecutive months came back empty
+        run = 0
+        for i in range(state['next_index']):
+            if i not in empty_months:
+                run = 0
+                continue
+            for position, empty in enumerate(empty_months[i]):
+                run = run + 1 if empty else 0
+                if run >= max_empty_months:
                     break
-                elif not target_months and empty_months_count >= max_empty_months:
-                    console.print(f"\n[yellow]Found {empty_months_count} consecutive empty months. Stopping scrape.[/]")
+            if run >= max_empty_months:
+                if state['stop_index'] is None or i + 1 < state['stop_index']:
+                    state['stop_index'] = i + 1
+                    state['stop_month'] = months_before(start_date, i * chunk_months + position).strftime('%Y-%m')
+                    logger.debug(f"Found {run} consecutive empty months, stopping at {state['stop_month']}")
+                break
+    
+    def report_chunk(index, chunk_keys, months, events):
+        counts = {}
+        for event in events:
+            month = event_month(event)
+            counts[month] = counts.get(month, 0) + 1
+        with lock:
+            results[index] = events
+            if journal:
+                pending[index] = months
+            empty_months[index] = [not counts.get(key) and not skip_months.get(key) for key in chunk_keys]
+            if total_months is None:
+                find_stop()
+            if journal:
+                journal_chunks()
+    
+    def worker(progress):
+        driver = setup_driver()
+        
+        def restart_driver():
+            nonlocal driver
+            try:
+                quit_driver(driver)
+            except Exception as e:
+                logger.debug(f"Error closing dead Chrome driver: {str(e)}")
+            driver = setup_driver()
+            return driver
+        
+        try:
+            while running:
+                chunk = claim_chunk()
+                if chunk is None:
                     break
+                index, offset, length = chunk
+                chunk_start = months_before(start_date, offset)
+                chunk_keys = [months_before(chunk_start, i).strftime('%Y-%m') for i in range(length)]
                 
-                # Try to navigate backward
-                prev_button = driver.find_element(By.CSS_SELECTOR, "button[aria-label*='Previous']")
-                if not prev_button.is_enabled():
-                    console.print("\n[yellow]Reached the beginning of available calendar data[/]")
-                    break
-                    
-                prev_button.click()
-                time.sleep(2)
-                months_traversed += 1
-                progress.advance(scrape_task)
+                if all(key in skip_months for key in chunk_keys):
+                    logger.debug(f"Chunk {index} is already captured, skipping")
+                    report_chunk(index, chunk_keys, [], [])
+                    continue
                 
+                logger.debug(f"Worker loading chunk {index} ({length} months from {chunk_start.strftime('%B %Y')})")
+                try:
+                    # The agenda walker loads its own pages
+                    if month_walker(url) is walk_months:
+                        try:
+                            with_retry('load', load_month, driver, url, chunk_start)
+                        except Exception as e:
+                            if not is_driver_dead(e):
+                                raise
+                            restart_driver()
+                            with_retry('load', load_month, driver, url, chunk_start)
+                    
+                    # Months are journaled by report_chunk, once it is known they come before the empty months
+                    months = []
+                    events = scrape_direction(driver, max_empty_months, length - 1, start_date=chunk_start,
+                                              progress=progress, collect=False, url=url, skip_months=skip_months,
+                                              on_month=months.append, restart_driver=restart_driver)
+                except Exception as e:
+                    fail_chunk(index, e)
+                    if is_driver_dead(e):
+                        restart_driver()
+                    continue
+                report_chunk(index, chunk_keys, months, events)
+        finally:
+            try:
+                quit_driver(driver)
             except Exception as e:
-                logger.error(f"Error during scraping: {str(e)}")
-                break
+                logger.warning(f"Error closing Chrome driver: {str(e)}")
+    
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TaskProgressColumn(),
+        console=console
+    ) as progress:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(worker, progress) for _ in range(workers)]
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Worker failed: {str(e)}")
+    
+    stop_index, stop_month = state['stop_index'], state['stop_month']
+    if journal:
+        # Chunks after one that could not be scraped are still kept, for the next run to resume from
+        journal_chunks(through=max(results, default=-1) + 1)
+    for index in sorted(results):
+        if not before_stop(index):
+            break
+        events = results[index]
+        if index == (stop_index or 0) - 1:
+            # Months past the empty run are not part of the scrape, as if a single driver had stopped there
+            events = [event for event in events if (event_month(event) or stop_month) >= stop_month]
+        collected_events.extend(collected_index.add(events))
+    
+    # Chunks that were never scraped, because they kept failing or every worker died before claiming them
+    end_index = stop_index if stop_index is not None else state['next_index']
+    missing = {index for index in range(end_index) if index not in results or index in failed}
+    if total_months is not None:
+        missing |= {index for index in range(-(-total_months // chunk_months)) if index not in results}
+    if running and missing:
+        raise Exception(f"Could not scrape {len(missing)} of the calendar's month chunks "
+                        f"({', '.join(str(index) for index in sorted(missing))})")
+    if running and total_months is None and stop_index is None:
+        raise Exception("Every Chrome driver failed before the end of the calendar was found")
+    
+    return collected_events
+
+def read_feed_months(source, target_months=None):
+    """
+    Reads an iCal feed (URL or local .ics file) and returns {'YYYY-MM': events} for the months a browser
+    scrape would cover: from target_months months ago (or the first event) to the end of the current month
+    """
+    with metrics.timed('ics_fetch'):
+        text = read_feed(source)
+    
+    now = datetime.now()
+    until = months_before(now, -1) - timedelta(seconds=1)  # End of the current month
+    since = months_before(now, target_months) if target_months is not None else None
+    with metrics.timed('ics_parse'):
+        return events_by_month(text, until=until, since=since)
+
+def ingest_ics(calendar_id, journal, target_months=None, ics_source=None, delta=None):
+    """
+    Reads events from the calendar's iCal feed (or a local .ics file) into the journal,
+    covering the same months a browser scrape would.
+    Returns the events, raises if the feed is not available.
+    """
+    months = read_feed_months(ics_source or public_feed_url(calendar_id), target_months)
     
+    events = []
+    for month in sorted(months, reverse=True):
+        heading = datetime.strptime(month, '%Y-%m').strftime('%B %Y')
+        journal.append_month(month, heading, months[month])
+        if delta:
+            delta.record_month(month, months[month])
+        events.extend(months[month])
+    metrics.increment('months', len(months))
+    metrics.increment('events', len(events))
+    
+    console.print(f"[green]Read {len(events)} events across {len(months)} months from the iCal feed[/]")
     return events
 
-def fetch_calendar_data(url, max_empty_months=18, target_months=None):
+def carry_previous_runs(journal):
+    """
+    Carries months captured by previous runs of this calendar into the new journal.
+    Returns {'YYYY-MM': month record} of the previously captured months.
+    """
+    calendar_dir = os.path.dirname(journal.run_dir)
+    previous = load_previous_months(calendar_dir, exclude_dir=journal.run_dir)
+    
+    for month in sorted(previous, reverse=True):
+        record = previous[month]
+        journal.append_month(month, record.get('heading'), record['events'], record.get('scraped_at'))
+    
+    return previous
+
+def months_to_skip(previous, fresh_months):
+    """
+    Returns {'YYYY-MM': event count} of the previously captured months that do not need
+    scraping again, which excludes the most recent fresh_months months
+    """
+    if not previous:
+        return {}
+    
+    now = datetime.now()
+    fresh_keys = {months_before(now, i).strftime('%Y-%m') for i in range(fresh_months)}
+    skip_months = {month: len(record['events']) for month, record in previous.items() if month not in fresh_keys}
+    
+    console.print(f"[green]Resuming:[/] {len(skip_months)} months already captured, "
+                  f"re-fetching the last {fresh_months} months")
+    return skip_months
+
+def fetch_calendar_data(url, max_empty_months=18, target_months=None, workers=1, resume=True, fresh_months=2,
+                        delta_stop=None, source='auto', ics_source=None, prometheus_path=None):
     """
-    Fetches calendar data using undetected-chromedriver.
+    Fetches calendar data from the public iCal feed or using undetected-chromedriver.
+    workers: number of Chrome drivers to scrape with in parallel
+    resume: if True, months captured by previous runs are skipped
+    fresh_months: number of recent months that are always re-fetched when resuming
+    delta_stop: if set, months are compared with previous runs instead of skipped, and scraping
+                stops after this many consecutive unchanged months
+    source: 'ics' to read the iCal feed, 'browser' to scrape the page, 'auto' to try the feed first
+    ics_source: iCal feed URL or local .ics file to read instead of the calendar's public feed
+    prometheus_path: if set, the run's metrics are also written there in the Prometheus text format
     Returns the collected events.
     """
-    global current_driver, running, collected_events
+    global current_driver, running, collected_events, collected_index
     collected_events = []  # Reset collected events at start
+    collected_index = EventIndex()
+    delta = None
+    journal = None
+    completed = False  # Only a scrape that got to its end is saved as final
+    metrics.reset()
     
     try:
+        journal = open_run_journal(current_calendar_id)
+        previous = carry_previous_runs(journal) if resume or delta_stop else {}
+        for month in sorted(previous, reverse=True):
+            collected_events.extend(collected_index.add(previous[month]['events']))
+        
+        if delta_stop:
+            delta = DeltaTracker(current_calendar_id, previous, stop_after=delta_stop)
+            skip_months = {}
+            console.print(f"[green]Delta mode:[/] comparing against {len(previous)} captured months, "
+                          f"stopping after {delta_stop} unchanged months")
+            if workers > 1:
+                console.print("[yellow]Delta mode scrapes with a single driver[/]")
+                workers = 1
+        else:
+            skip_months = months_to_skip(previous, fresh_months) if resume else {}
+        
+        if source in ('auto', 'ics'):
+            try:
+                ics_events = ingest_ics(current_calendar_id, journal, target_months, ics_source, delta)
+                collected_events.extend(collected_index.add(ics_events))
+                completed = True
+                return collected_events
+            except Exception as e:
+                if source == 'ics':
+                    raise
+                logger.debug(f"iCal feed not available: {str(e)}")
+                console.print("[yellow]iCal feed not available, scraping the calendar page instead[/]")
+        
+        if workers > 1:
+            console.print(f"[cyan]Scraping with {workers} Chrome drivers...[/]")
+            scrape_pool(url, workers, max_empty_months, target_months, journal=journal, skip_months=skip_months)
+            completed = running  # Ctrl+C stops the walks early
+            return collected_events
+        
         with Progress(SpinnerColumn(), TextColumn("[cyan]Starting Chrome driver...[/]")) as progress:
             progress.add_task("", total=None)
             current_driver = setup_driver()
@@ -433,16 +1259,29 @@ def fetch_calendar_data(url, max_empty_months=18, target_months=None):
         with Progress(SpinnerColumn(), TextColumn("[cyan]Loading calendar URL...[/]")) as progress:
             progress.add_task("", total=None)
             logger.debug(f"Accessing URL: {url}")
-            current_driver.get(url)
+            with metrics.timed('page_load'):
+                current_driver.get(url)
             
             if not wait_for_calendar_load(current_driver):
                 raise Exception("Calendar failed to load")
         
         console.print("[green]Calendar loaded successfully[/]")
-        time.sleep(5)  # Give extra time for JavaScript to run
+        wait_for_initial_render(current_driver)
+        
+        def restart_driver():
+            global current_driver
+            try:
+                quit_driver(current_driver)
+            except Exception as e:
+                logger.debug(f"Error closing dead Chrome driver: {str(e)}")
+            current_driver = setup_driver()
+            return current_driver
         
         # Scrape backwards only
-        scrape_direction(current_driver, max_empty_months, target_months)
+        scrape_direction(current_driver, max_empty_months, target_months, journal=journal,
+                         url=url, skip_months=skip_months, delta=delta, keep_events=False,
+                         restart_driver=restart_driver)
+        completed = running  # Ctrl+C stops the walk early
         return collected_events
 
     except Exception as e:
@@ -451,23 +1290,40 @@ def fetch_calendar_data(url, max_empty_months=18, target_months=None):
         raise
     
     finally:
-        # Always save progress before closing
+        print_wait_summary()
+        
+        if delta:
+            delta_path = delta.save(journal.run_dir)
+            totals = delta.totals()
+            console.print(f"[green]Changes since last run:[/] {totals['added']} added, {totals['removed']} removed, "
+                          f"{totals['changed']} changed ([blue]{delta_path}[/])")
+        
+        # Always save progress before closing, a scrape that failed part way is kept as partial
         if collected_events:  # Check if we have any events to save
-            console.print("\nSaving final data...")
-            save_progress(collected_events, current_calendar_id, final=True)
+            console.print("\nSaving final data..." if completed else "\nSaving partial data...")
+            save_progress(collected_events, current_calendar_id, final=completed)
+        
+        if current_journal:
+            current_journal.close()
+        
+        if journal:
+            save_metrics(journal.run_dir, current_calendar_id, prometheus_path)
         
         if current_driver:
             try:
                 logger.debug("Closing Chrome driver")
-                current_driver.quit()
+                quit_driver(current_driver)
                 current_driver = None
             except Exception as e:
                 logger.warning(f"Error closing Chrome driver: {str(e)}")
     
     return collected_events
 
-def main():
-    global collected_events, current_calendar_id, logger
+def main(argv=None):
+    """
+    Command line entry point, argv defaults to sys.argv[1:]
+    """
+    global collected_events, current_calendar_id, logger, event_store, view
     
     # Set up signal handlers
     signal.signal(signal.SIGINT, signal_handler)
@@ -476,9 +1332,38 @@ def main():
     parser = argparse.ArgumentParser(description='Scrape Google Calendar events')
     parser.add_argument('-debug', action='store_true', help='Enable debug logging')
     parser.add_argument('-months', type=int, help='Number of months to scrape (overrides empty months check)')
-    args = parser.parse_args()
+    parser.add_argument('-workers', type=int, default=1, help='Number of Chrome drivers to scrape with in parallel')
+    parser.add_argument('-timeout', type=float, default=10, help='Seconds to wait for a month to render before moving on')
+    parser.add_argument('-fresh', type=int, default=2, help='Number of recent months to re-fetch when resuming a previous scrape')
+    parser.add_argument('-restart', action='store_true', help='Ignore months captured by previous scrapes and start from scratch')
+    parser.add_argument('-delta', type=int, metavar='N', help='Compare with previous scrapes and stop after N consecutive unchanged months')
+    parser.add_argument('-settle', type=float, default=0.5, help='Seconds the event grid must stay unchanged to count as rendered')
+    parser.add_argument('-source', choices=['auto', 'ics', 'browser'], default='auto',
+                        help='Read the public iCal feed, scrape the page in a browser, or try the feed first (default)')
+    parser.add_argument('-ics', metavar='PATH_OR_URL', help='Read events from this iCal feed or .ics file instead of the public feed')
+    parser.add_argument('-batch', metavar='FILE', help='Scrape every calendar URL listed in FILE instead of prompting for one')
+    parser.add_argument('-view', choices=['month', 'agenda'], default='month',
+                        help='Walk month views one at a time (default), or read 12 months per agenda page')
+    parser.add_argument('-retries', type=int, default=3, help='Attempts per page operation before reloading the month')
+    parser.add_argument('-backend', choices=['uc', 'chrome'], default='uc',
+                        help='Drive undetected_chromedriver (default) or plain Selenium Chrome, which starts faster')
+    parser.add_argument('-profile', metavar='DIR', help='Keep Chrome profiles and caches in DIR and reuse them across runs')
+    parser.add_argument('-noblock', action='store_true', help='Load images, fonts and analytics instead of blocking them')
+    parser.add_argument('-metrics', metavar='FILE', help='Also write the run metrics to FILE in the Prometheus text format')
+    parser.add_argument('-sqlite', nargs='?', const='', metavar='PATH',
+                        help='Also store events in an SQLite database (default calendars/calspy.db) for date range queries')
+    parser.add_argument('-export', metavar='FORMATS',
+                        help='Also export the finished scrape, comma separated: ndjson, csv, ics, columnar')
+    args = parser.parse_args(argv)
     
     logger = setup_logging(args.debug)
+    configure_waits(timeout=args.timeout, settle=args.settle)
+    configure_retries(attempts=args.retries)
+    configure_browser(backend=args.backend, block_resources=not args.noblock, profile_dir=args.profile)
+    view = args.view
+    if args.sqlite is not None:
+        from src.storage import SqliteStore
+        event_store = SqliteStore(args.sqlite or None)
     
     try:
         ascii_art = f"""
@@ -491,6 +1376,14 @@ def main():
 [dim]Press Ctrl+C at any time to save progress and exit[/]"""
         
         console.print(ascii_art)
+        
+        if args.batch:
+            from src.batch import run_batch
+            run_batch(args.batch, workers=args.workers, max_empty_months=18, target_months=args.months or None,
+                      resume=not args.restart, fresh_months=args.fresh, source=args.source,
+                      prometheus_path=args.metrics)
+            return
+        
         console.print("\nPlease enter the public Google Calendar URL:")
         calendar_url = input().strip()
         
@@ -507,7 +1400,13 @@ def main():
         else:
             console.print("[green]Will scrape until finding 18 consecutive empty months[/]")
             
-        events = fetch_calendar_data(calendar_url, max_empty_months=18, target_months=args.months)
+        if args.workers > 1:
+            console.print(f"[green]Using {args.workers} parallel workers[/]")
+            
+        events = fetch_calendar_data(calendar_url, max_empty_months=18, target_months=args.months or None,
+                                     workers=args.workers, resume=not args.restart, fresh_months=args.fresh,
+                                     delta_stop=args.delta, source='ics' if args.ics else args.source,
+                                     ics_source=args.ics, prometheus_path=args.metrics)
         
         if not events:
             console.print("[yellow]No events found in the calendar.[/]")
@@ -515,9 +1414,12 @@ def main():
         
         console.print(f"\n[green]Found {len(events)} events total[/]")
         
-        if running:  # Only save as final if we weren't interrupted
-            save_progress(events, current_calendar_id, final=True)
+        if running:  # fetch_calendar_data saved the run as final unless it was interrupted
             console.print("[green]Scraping completed successfully![/]")
+            if args.export:
+                from src.export import export_calendar
+                export_calendar(current_calendar_id, [name for name in args.export.split(',') if name],
+                                console=console)
         
     except Exception as e:
         logger.error(f"Fatal error: {str(e)}")
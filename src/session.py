@@ -0,0 +1,186 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from src import browser, metrics, scraper
+from src.ics import public_feed_url
+
+logger = logging.getLogger('scraper')
+
+_DONE = object()
+
+class CalendarScraper:
+    """
+    Scrapes one calendar without touching the scraper's module globals, so several can run in one process.
+    Each session owns its Chrome driver, started on first use. months() yields each month as it is
+    read; amonths() does the same for asyncio code, running every driver call in the session's own thread.
+
+        async with CalendarScraper(url) as session:
+            async for month, heading, events in session.amonths(target_months=12):
+                ...
+    """
+
+    def __init__(self, url, source='auto', ics_source=None, max_empty_months=18, view='month'):
+        """
+        url: public Google Calendar URL
+        source: 'ics' to read the iCal feed, 'browser' to scrape the page, 'auto' to try the feed first
+        ics_source: iCal feed URL or local .ics file to read instead of the calendar's public feed
+        max_empty_months: stop after this many consecutive empty months when no target is given
+        view: 'month' to walk month views, 'agenda' to read many months per agenda page
+        """
+        self.url = url
+        self.calendar_id = scraper.extract_calendar_id(url)
+        self.source = source
+        self.ics_source = ics_source
+        self.max_empty_months = max_empty_months
+        self.view = view
+        self.driver = None
+        self._stop = threading.Event()
+        self._executor = None
+
+    def stop(self):
+        """
+        Asks a running scrape to stop after the current month
+        """
+        self._stop.set()
+
+    @property
+    def stopped(self):
+        return self._stop.is_set()
+
+    def quit_driver(self):
+        if self.driver:
+            try:
+                browser.quit_driver(self.driver)
+            except Exception as e:
+                logger.warning(f"Error closing Chrome driver: {str(e)}")
+            self.driver = None
+
+    def close(self):
+        """
+        Quits the session's driver and shuts down its thread
+        """
+        self.quit_driver()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.driver:
+            await self._run(self.quit_driver)
+        self.close()
+
+    def months(self, target_months=None):
+        """
+        Yields ('YYYY-MM', heading, events) for each month from the current one backwards.
+        Events already yielded for an earlier month (adjacent month views overlap) are left out.
+        target_months: number of months to go back, otherwise stops after max_empty_months empty months
+        """
+        if self.source in ('auto', 'ics'):
+            try:
+                months = self.feed_months(target_months)
+            except Exception as e:
+                if self.source == 'ics':
+                    raise
+                logger.debug(f"iCal feed not available for {self.calendar_id}: {str(e)}")
+            else:
+                yield from months
+                return
+
+        yield from self.browser_months(target_months)
+
+    def feed_months(self, target_months=None):
+        """
+        Reads the iCal feed and returns the months a browser scrape would cover, newest first.
+        Raises if the feed is not available.
+        """
+        months = scraper.read_feed_months(self.ics_source or public_feed_url(self.calendar_id), target_months)
+        return [(month, datetime.strptime(month, '%Y-%m').strftime('%B %Y'), months[month])
+                for month in sorted(months, reverse=True)]
+
+    def browser_months(self, target_months=None):
+        """
+        Walks the calendar page backwards in the session's driver, yielding one month at a time
+        """
+        walk = scraper.month_walker(self.url, self.view)
+        if self.driver is None:
+            self.driver = scraper.setup_driver()
+            with metrics.timed('page_load'):
+                self.driver.get(self.url)
+            if not scraper.wait_for_calendar_load(self.driver):
+                raise Exception(f"Calendar failed to load: {self.calendar_id}")
+            scraper.wait_for_initial_render(self.driver)
+
+        def restart_driver():
+            self.quit_driver()
+            self.driver = scraper.setup_driver()
+            return self.driver
+
+        for scraped in walk(self.driver, self.max_empty_months, target_months, url=self.url,
+                            should_continue=lambda: not self.stopped, restart_driver=restart_driver):
+            yield scraped.month, scraped.heading, scraped.new_events
+
+    def scrape(self, target_months=None):
+        """
+        Returns every event of the calendar, newest month first
+        """
+        return [event for _, _, events in self.months(target_months) for event in events]
+
+    async def _run(self, function, *args):
+        if self._executor is None:
+            # One thread per session: the driver and the month generator are only ever used from it
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='calspy-session')
+        return await asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+
+    async def amonths(self, target_months=None):
+        """
+        Async version of months(), each month is read in the session's thread without blocking the event loop
+        """
+        months = self.months(target_months)
+        try:
+            while True:
+                item = await self._run(next, months, _DONE)
+                if item is _DONE:
+                    break
+                yield item
+        finally:
+            await self._run(months.close)
+
+    async def ascrape(self, target_months=None):
+        """
+        Async version of scrape()
+        """
+        return [event async for _, _, events in self.amonths(target_months) for event in events]
+
+async def scrape_many(urls, concurrency=4, target_months=None, **options):
+    """
+    Scrapes several calendars concurrently in one event loop, at most `concurrency` at a time.
+    options are passed to CalendarScraper.
+    Returns {calendar_id: events}, or the exception for calendars that failed (keyed by URL if it has no ID).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def scrape_one(url):
+        async with semaphore:
+            try:
+                session = CalendarScraper(url, **options)
+            except Exception as e:
+                return url, e
+            async with session:
+                try:
+                    return session.calendar_id, await session.ascrape(target_months)
+                except Exception as e:
+                    logger.error(f"Error scraping {session.calendar_id}: {str(e)}")
+                    return session.calendar_id, e
+
+    return dict(await asyncio.gather(*(scrape_one(url) for url in urls)))
@@ -0,0 +1,183 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, time as dt_time
+from src.dedup import event_key
+from src.event_parser import parse_datetime_text
+
+DEFAULT_DB_FILENAME = 'calspy.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    calendar_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    start TEXT,
+    end TEXT,
+    all_day INTEGER NOT NULL DEFAULT 0,
+    timezone TEXT,
+    datetime TEXT,
+    summary TEXT,
+    description TEXT,
+    location TEXT,
+    calendar TEXT,
+    attendees TEXT,
+    PRIMARY KEY (calendar_id, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS events_calendar_start ON events (calendar_id, start);
+CREATE TABLE IF NOT EXISTS snapshots (
+    calendar_id TEXT PRIMARY KEY,
+    scrape_timestamp TEXT,
+    scrape_status TEXT,
+    event_count INTEGER
+);
+"""
+
+EVENT_COLUMNS = ('start', 'end', 'all_day', 'timezone', 'datetime', 'summary', 'description', 'location',
+                 'calendar', 'attendees')
+
+def default_db_path():
+    """
+    Returns the path of the shared database under calendars/
+    """
+    return os.path.join(os.getcwd(), 'calendars', DEFAULT_DB_FILENAME)
+
+class SqliteStore:
+    """
+    SQLite storage for scraped calendars, kept beside the JSON snapshots.
+    Events are indexed by calendar and start time so date ranges can be read
+    without loading a whole calendar.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_db_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.row_factory = sqlite3.Row
+        with self._lock:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(SCHEMA)
+
+    def write_snapshot(self, calendar_id, events, status):
+        """
+        Replaces the stored events of a calendar with a new snapshot
+        """
+        rows = []
+        for index, event in enumerate(events):
+            start, end, all_day = event.get('start'), event.get('end'), event.get('all_day', False)
+            key = event_key(event)
+            if start is None and 'all_day' not in event:
+                # Events saved before start/end were stored, index them by their datetime text.
+                # Their keys are not unique (see EventIndex), so each one gets its position as well.
+                start, end, all_day = parse_datetime_text(event.get('datetime'))
+                key = f"{key}-{index}"
+            rows.append((
+                calendar_id, key, start, end, 1 if all_day else 0, event.get('timezone'),
+                event.get('datetime', ''), event.get('summary', ''), event.get('description', ''),
+                event.get('location', ''), event.get('calendar', ''), json.dumps(event.get('attendees') or [], ensure_ascii=False)
+            ))
+
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM events WHERE calendar_id = ?', (calendar_id,))
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO events (calendar_id, key, start, end, all_day, timezone, datetime, summary, '
+                'description, location, calendar, attendees) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            self._connection.execute(
+                'INSERT OR REPLACE INTO snapshots (calendar_id, scrape_timestamp, scrape_status, event_count) '
+                'VALUES (?, ?, ?, ?)',
+                (calendar_id, time.strftime('%Y-%m-%d %H:%M:%S'), status, len(rows))
+            )
+
+    def query(self, calendar_id=None, start=None, end=None, text=None, limit=None):
+        """
+        Yields stored event dicts starting in [start, end), newest first.
+        start and end are datetimes or ISO strings, text matches summary, description or location.
+        """
+        clauses = []
+        params = []
+        if calendar_id is not None:
+            clauses.append('calendar_id = ?')
+            params.append(calendar_id)
+        if start is not None:
+            clauses.append('start >= ?')
+            params.append(bound_text(start))
+        if end is not None:
+            clauses.append('start < ?')
+            params.append(bound_text(end))
+        if text:
+            clauses.append("(summary LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\' "
+                           "OR location LIKE ? ESCAPE '\\')")
+            pattern = '%' + text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            params.extend([pattern] * 3)
+
+        sql = f"SELECT calendar_id, {', '.join(EVENT_COLUMNS)} FROM events"
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY start DESC'
+        if limit:
+            sql += f' LIMIT {int(limit)}'
+
+        with self._lock:
+            rows = self._connection.execute(sql, params).fetchall()
+        for row in rows:
+            yield row_to_event(row)
+
+    def load(self, calendar_id, start=None, end=None):
+        """
+        Returns calendar data in the snapshot layout used by generate_calendar, limited to [start, end)
+        """
+        with self._lock:
+            snapshot = self._connection.execute(
+                'SELECT scrape_timestamp, scrape_status FROM snapshots WHERE calendar_id = ?', (calendar_id,)
+            ).fetchone()
+        if snapshot is None:
+            raise FileNotFoundError(f"No stored data for calendar: {calendar_id}")
+        return {
+            'calendar_id': calendar_id,
+            'scrape_timestamp': snapshot['scrape_timestamp'],
+            'scrape_status': snapshot['scrape_status'],
+            'events': list(self.query(calendar_id, start, end))
+        }
+
+    def calendars(self):
+        """
+        Returns the IDs of all stored calendars
+        """
+        with self._lock:
+            return [row[0] for row in self._connection.execute('SELECT calendar_id FROM snapshots ORDER BY 1')]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+def bound_text(value):
+    """
+    Returns a query bound as text that compares correctly with stored starts.
+    All-day events store 'YYYY-MM-DD', which sorts before 'YYYY-MM-DDT00:00:00', so midnight bounds drop the time.
+    """
+    if isinstance(value, str):
+        return value
+    if isinstance(value, datetime) and value.time() == dt_time.min:
+        return value.date().isoformat()
+    return value.isoformat()
+
+def row_to_event(row):
+    """
+    Converts a database row back into a stored event dict
+    """
+    return {
+        'datetime': row['datetime'],
+        'summary': row['summary'],
+        'description': row['description'],
+        'location': row['location'],
+        'attendees': json.loads(row['attendees'] or '[]'),
+        'start': row['start'],
+        'end': row['end'],
+        'all_day': bool(row['all_day']),
+        'timezone': row['timezone'],
+        'calendar': row['calendar']
+    }
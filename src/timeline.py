@@ -0,0 +1,218 @@
+import heapq
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.dedup import dedupe_events
+from src.manifest import MANIFEST_FILENAME, latest_snapshot
+from src.records import to_records
+
+# Below this many snapshots they are read in this process, starting a pool would cost more than it saves
+POOL_THRESHOLD = 2
+
+def calendars_directory():
+    """
+    Returns the calendars/ directory every calendar's runs are stored under
+    """
+    return os.path.join(os.getcwd(), 'calendars')
+
+def calendar_ids():
+    """
+    Returns the IDs of every scraped calendar under calendars/.
+    Batch reports, the SQLite store, merged reports and other entries that hold no runs are skipped.
+    """
+    base_dir = calendars_directory()
+    if not os.path.isdir(base_dir):
+        return []
+    ids = []
+    for name in sorted(os.listdir(base_dir)):
+        path = os.path.join(base_dir, name)
+        if not os.path.isdir(path):
+            continue
+        if os.path.exists(os.path.join(path, MANIFEST_FILENAME)) or any(
+                os.path.isdir(os.path.join(path, entry)) for entry in os.listdir(path)):
+            ids.append(name)
+    return ids
+
+def read_calendar(calendar_id, snapshot_path):
+    """
+    Loads one snapshot and returns (calendar_id, scrape_timestamp, records) with records newest first.
+    Runs in a worker process, so the JSON decode and record building of many calendars happen in parallel.
+    Records without a calendar name are tagged with the calendar's ID.
+    """
+    with open(snapshot_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    records = to_records(dedupe_events(data.get('events', [])))
+    for record in records:
+        record.calendar = record.calendar or calendar_id
+    records.sort(key=lambda record: record.sort_key, reverse=True)
+    return calendar_id, data.get('scrape_timestamp'), records
+
+def load_calendars(ids=None, use_partial=False, workers=None, console=None):
+    """
+    Loads the latest snapshot of each calendar (all calendars under calendars/ if ids is None).
+    Returns [(calendar_id, scrape_timestamp, records)], calendars without a snapshot are left out.
+    workers: processes decoding snapshots, defaults to one per CPU
+    """
+    snapshots = []
+    for calendar_id in (calendar_ids() if ids is None else ids):
+        path = latest_snapshot(calendar_id, use_partial)
+        if path:
+            snapshots.append((calendar_id, path))
+        elif console:
+            console.print(f"[yellow]No snapshot found for {calendar_id}, skipping[/]")
+        else:
+            print(f"No snapshot found for {calendar_id}, skipping")
+
+    if len(snapshots) < POOL_THRESHOLD or workers == 1:
+        return [read_calendar(calendar_id, path) for calendar_id, path in snapshots]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(read_calendar, *zip(*snapshots)))
+
+def merge_timeline(calendars):
+    """
+    Merges the records of several calendars (each newest first) into one newest-first iterator
+    """
+    return heapq.merge(*(records for _, _, records in calendars), key=lambda record: record.sort_key,
+                       reverse=True)
+
+def record_matches(record, text):
+    """
+    Returns True if text appears (case-insensitively) in the record's summary, location or description
+    """
+    text = text.lower()
+    parts = (record.summary, record.location, *record.description_parts)
+    return any(text in (part or '').lower() for part in parts)
+
+def query_timeline(calendars, text=None, start=None, end=None, limit=None):
+    """
+    Yields the merged records starting in [start, end) that match text, newest first.
+    The merge is in time order, so it stops at the first record older than start.
+    """
+    count = 0
+    for record in merge_timeline(calendars):
+        if start is not None or end is not None:
+            record_start = record.start_datetime
+            if record_start is None or (start is not None and record_start < start):
+                return
+            if end is not None and record_start >= end:
+                continue
+        if text and not record_matches(record, text):
+            continue
+        yield record
+        count += 1
+        if limit and count >= limit:
+            return
+
+def render_timeline(calendars, text=None, start=None, end=None, paged=None, chunk_size=500, output_path=None,
+                    console=None):
+    """
+    Writes one HTML report of the events of the given calendars that match text and start in [start, end),
+    tagged with the calendar they come from.
+    output_path: where to write the report, defaults to calendars/timeline_<timestamp>.html
+    Returns the path of the report.
+    """
+    from src.generate_calendar import PAGED_REPORT_THRESHOLD, render_to_file, write_report_data
+
+    records = list(query_timeline(calendars, text, start, end))
+    title = f"{len(calendars)} calendars" if len(calendars) != 1 else calendars[0][0]
+    scrape_timestamp = max((timestamp for _, timestamp, _ in calendars if timestamp), default=None)
+
+    if output_path is None:
+        output_path = os.path.join(calendars_directory(), f"timeline_{time.strftime('%Y%m%d_%H%M%S')}.html")
+    output_path = os.path.abspath(output_path)
+    base_dir = os.path.dirname(output_path)
+    name = os.path.splitext(os.path.basename(output_path))[0]
+    os.makedirs(base_dir, exist_ok=True)
+
+    if paged is None:
+        paged = len(records) > PAGED_REPORT_THRESHOLD
+    if paged:
+        data_dirname = f"{name}_data"
+        chunk_count = write_report_data(records, os.path.join(base_dir, data_dirname), chunk_size)
+        render_to_file('calendar_report_template.html', output_path, report={
+            'calendar_id': title,
+            'scrape_timestamp': scrape_timestamp,
+            'event_count': len(records),
+            'chunk_size': chunk_size,
+            'chunk_count': chunk_count,
+            'data_dir': data_dirname,
+            'show_calendar': True
+        })
+    else:
+        render_to_file('calendar_display_template.html', output_path,
+                       test_data={'calendar_id': title, 'scrape_timestamp': scrape_timestamp},
+                       events=records, show_calendar=True)
+
+    if console:
+        console.print(f"[green]Timeline of {len(records)} events has been generated as:[/] [blue]{output_path}[/]")
+    else:
+        print(f"Timeline of {len(records)} events has been generated as: {output_path}")
+    return output_path
+
+def print_records(records, as_json=False):
+    """
+    Prints records one per line, as tab-separated text or as JSON lines
+    """
+    count = 0
+    for record in records:
+        count += 1
+        if as_json:
+            print(json.dumps(record.to_dict(), ensure_ascii=False))
+        else:
+            start = record.start.isoformat() if record.start else record.datetime_text
+            print('\t'.join((start, record.calendar, record.summary, record.location)))
+    return count
+
+def main(argv=None):
+    """
+    Command line entry point, argv defaults to sys.argv[1:]
+    """
+    import argparse
+    from datetime import datetime
+    parser = argparse.ArgumentParser(description='Merge the scraped calendars into one timeline and query it')
+    parser.add_argument('command', choices=['render', 'query', 'list'],
+                        help='render an HTML timeline, print matching events, or list the scraped calendars')
+    parser.add_argument('text', nargs='?', help='Only events whose summary, location or description contain this')
+    parser.add_argument('-calendars', nargs='+', metavar='ID', help='Calendars to include (default all)')
+    parser.add_argument('-from', dest='start', type=datetime.fromisoformat, metavar='YYYY-MM-DD',
+                        help='Only include events starting on or after this date')
+    parser.add_argument('-to', dest='end', type=datetime.fromisoformat, metavar='YYYY-MM-DD',
+                        help='Only include events starting before this date')
+    parser.add_argument('-partial', action='store_true', help='Use partial snapshots of unfinished scrapes')
+    parser.add_argument('-limit', type=int, help='Print at most this many events')
+    parser.add_argument('-json', action='store_true', help='Print events as JSON lines')
+    parser.add_argument('-sqlite', nargs='?', const='', metavar='PATH',
+                        help='Query the SQLite event store (default calendars/calspy.db) instead of the snapshots')
+    parser.add_argument('-paged', action='store_true', help='Write the paged report regardless of size')
+    parser.add_argument('-output', metavar='FILE', help='Where to write the rendered timeline')
+    parser.add_argument('-workers', type=int, help='Processes decoding snapshots (default one per CPU)')
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for calendar_id in calendar_ids():
+            print(calendar_id)
+    elif args.command == 'query' and args.sqlite is not None:
+        # The store answers from its index, without reading any snapshot
+        from src.storage import SqliteStore
+        store = SqliteStore(args.sqlite or None)
+        try:
+            calendars = []
+            for calendar_id in args.calendars or store.calendars():
+                records = to_records(store.query(calendar_id, args.start, args.end, args.text, args.limit))
+                for record in records:
+                    record.calendar = record.calendar or calendar_id
+                calendars.append((calendar_id, None, records))
+            print_records(query_timeline(calendars, limit=args.limit), args.json)
+        finally:
+            store.close()
+    else:
+        calendars = load_calendars(args.calendars, args.partial, args.workers)
+        if args.command == 'render':
+            render_timeline(calendars, args.text, args.start, args.end, paged=True if args.paged else None,
+                            output_path=args.output)
+        else:
+            print_records(query_timeline(calendars, args.text, args.start, args.end, args.limit), args.json)
+
+if __name__ == "__main__":
+    main()
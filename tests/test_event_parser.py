@@ -0,0 +1,17 @@
+"""
+Every label in the fixture corpus (src/fixtures/event_labels.json) parses as expected
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.event_parser import check_fixtures, load_fixtures
+
+def test_fixture_labels_parse_as_expected():
+    fixtures = load_fixtures()
+    assert fixtures
+    mismatches = check_fixtures(fixtures)
+    assert not mismatches, '\n'.join(f"{label}: expected {expected}, got {actual}"
+                                     for label, expected, actual in mismatches)
@@ -0,0 +1,35 @@
+"""
+Exports are written next to the data they are read from
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.export import export_calendar
+from src.journal import EventJournal, compact_journal
+from src.manifest import record_run
+
+def test_export_defaults_to_the_exported_run(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    calendar_dir = tmp_path / 'calendars' / 'calendar'
+    finished = calendar_dir / '20240101_000000'
+    finished.mkdir(parents=True)
+    record_run(str(finished), 'calendar')
+    journal = EventJournal('calendar', str(finished))
+    journal.append_month('2024-01', 'January 2024', [{'datetime': 'January 5, 2024', 'summary': 'Meeting',
+                                                       'start': '2024-01-05', 'end': '2024-01-05', 'all_day': True}])
+    journal.close()
+    compact_journal(str(finished), 'calendar', final=True)
+
+    # A newer run that never saved a snapshot
+    running = calendar_dir / '20991231_000000'
+    running.mkdir()
+    record_run(str(running), 'calendar')
+
+    results = export_calendar('calendar', ['ndjson'])
+    path, count = results['ndjson']
+    assert os.path.dirname(path) == str(finished)
+    assert count == 1
+    assert not os.listdir(running)
@@ -0,0 +1,91 @@
+"""
+The iCal backend reads feeds offline: parsing, recurrence expansion and grouping by month
+"""
+
+import os
+import sys
+from datetime import date, datetime
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.ics import MAX_OCCURRENCES, UnsupportedRecurrence, events_by_month, expand_rrule, parse_ics
+
+def feed(*events):
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0']
+    for properties in events:
+        lines += ['BEGIN:VEVENT', *properties, 'END:VEVENT']
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(lines) + '\r\n'
+
+def test_monthly_byday_ordinal():
+    start = datetime(2024, 1, 9, 10)
+    occurrences = list(expand_rrule(start, 'FREQ=MONTHLY;BYDAY=2TU;COUNT=4', datetime(2025, 1, 1)))
+    assert [occurrence.date() for occurrence in occurrences] == [
+        date(2024, 1, 9), date(2024, 2, 13), date(2024, 3, 12), date(2024, 4, 9)]
+
+def test_last_weekday_with_bysetpos():
+    start = date(2024, 1, 31)
+    occurrences = list(expand_rrule(start, 'FREQ=MONTHLY;BYDAY=MO,TU,WE,TH,FR;BYSETPOS=-1;COUNT=3',
+                                    date(2025, 1, 1)))
+    assert occurrences == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 29)]
+
+def test_yearly_bymonth_bymonthday_and_until():
+    start = date(2020, 7, 4)
+    occurrences = list(expand_rrule(start, 'FREQ=YEARLY;BYMONTH=7;BYMONTHDAY=4;UNTIL=20230101', date(2030, 1, 1)))
+    assert occurrences == [date(2020, 7, 4), date(2021, 7, 4), date(2022, 7, 4)]
+
+def test_exdates_are_skipped_but_counted():
+    start = date(2024, 3, 1)
+    occurrences = list(expand_rrule(start, 'FREQ=DAILY;COUNT=3', date(2025, 1, 1), exdates={date(2024, 3, 2)}))
+    assert occurrences == [date(2024, 3, 1), date(2024, 3, 3)]
+
+def test_unsupported_rule_raises():
+    with pytest.raises(UnsupportedRecurrence):
+        list(expand_rrule(datetime(2024, 1, 1, 9), 'FREQ=HOURLY', datetime(2024, 2, 1)))
+
+def test_long_daily_rule_expands_within_window():
+    # Over MAX_OCCURRENCES days from DTSTART, but only the window is expanded
+    start = date(2008, 1, 1)
+    occurrences = list(expand_rrule(start, 'FREQ=DAILY', date(2024, 12, 31), since_bound=date(2024, 1, 1)))
+    assert occurrences[0] == date(2024, 1, 1)
+    assert occurrences[-1] == date(2024, 12, 31)
+    assert len(occurrences) == 366
+
+def test_too_many_occurrences_raise():
+    # Stopping at the cap would leave the later months silently empty
+    with pytest.raises(UnsupportedRecurrence):
+        list(expand_rrule(date(2008, 1, 1), 'FREQ=DAILY', date(2008 + MAX_OCCURRENCES // 365 + 1, 1, 1)))
+
+def test_parse_ics_expands_and_overrides():
+    text = feed(
+        ['UID:standup', 'DTSTART:20240101T090000', 'DTEND:20240101T091500', 'SUMMARY:Standup',
+         'RRULE:FREQ=WEEKLY;BYDAY=MO;COUNT=3'],
+        ['UID:standup', 'RECURRENCE-ID:20240108T090000', 'DTSTART:20240108T100000', 'DTEND:20240108T101500',
+         'SUMMARY:Standup (moved)'],
+        ['UID:party', 'DTSTART;VALUE=DATE:20240120', 'DTEND;VALUE=DATE:20240121', 'SUMMARY:Party',
+         'LOCATION:Hall\\, Room 1'],
+        ['UID:cancelled', 'DTSTART:20240110T120000', 'STATUS:CANCELLED', 'SUMMARY:Gone'],
+    )
+    results = parse_ics(text, until=datetime(2024, 12, 31))
+    assert [(start, event['summary']) for start, event in results] == [
+        (datetime(2024, 1, 1, 9), 'Standup'),
+        (datetime(2024, 1, 8, 10), 'Standup (moved)'),
+        (datetime(2024, 1, 15, 9), 'Standup'),
+        (datetime(2024, 1, 20), 'Party'),
+    ]
+    party = results[-1][1]
+    assert party['all_day'] and party['start'] == party['end'] == '2024-01-20'
+    assert party['location'] == 'Hall, Room 1'
+    assert results[0][1]['datetime'] == 'January 1, 2024 9am to 9:15am'
+
+def test_parse_ics_raises_on_unsupported_rule():
+    text = feed(['UID:hourly', 'DTSTART:20240101T090000', 'SUMMARY:Ping', 'RRULE:FREQ=HOURLY'])
+    with pytest.raises(UnsupportedRecurrence):
+        parse_ics(text, until=datetime(2024, 2, 1))
+
+def test_events_by_month_fills_the_window():
+    text = feed(['UID:a', 'DTSTART;VALUE=DATE:20080105', 'SUMMARY:Daily', 'RRULE:FREQ=DAILY'])
+    months = events_by_month(text, until=datetime(2024, 3, 31, 23, 59, 59), since=datetime(2023, 12, 1))
+    assert sorted(months) == ['2023-12', '2024-01', '2024-02', '2024-03']
+    assert [len(months[month]) for month in sorted(months)] == [31, 31, 29, 31]
@@ -0,0 +1,28 @@
+"""
+Each calspy.py subcommand must import within its budget in calspy.IMPORT_BUDGETS, without Selenium, Chrome or Rich
+"""
+
+import os
+import re
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import calspy
+
+@pytest.mark.parametrize('name', list(calspy.IMPORT_BUDGETS))
+def test_command_imports_within_budget(name):
+    try:
+        # The first import also compiles bytecode, the budget is for the imports after that
+        calspy.measure_import(name)
+        elapsed, heavy = calspy.measure_import(name)
+    except ImportError as e:
+        missing = re.search(r"No module named '([^']+)'", str(e))
+        if missing and not missing.group(1).startswith('src'):
+            pytest.skip(f"{name} needs {missing.group(1)}, which is not installed")
+        raise
+
+    assert not heavy, f"{name} imports {', '.join(heavy)}"
+    assert elapsed <= calspy.IMPORT_BUDGETS[name], \
+        f"{name} took {elapsed * 1000:.0f}ms to import (budget {calspy.IMPORT_BUDGETS[name] * 1000:.0f}ms)"
@@ -0,0 +1,65 @@
+"""
+The event journal keeps what was scraped before a crash: a month record cut off mid-write falls back to
+the month's previous record
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.journal import EventJournal, journal_events, journal_months
+
+def event(day, summary):
+    return {'datetime': f'March {day}, 2024', 'summary': summary, 'start': f'2024-03-{day:02d}',
+            'end': f'2024-03-{day:02d}', 'all_day': True}
+
+def write_journal(run_dir, records):
+    journal = EventJournal('calendar', str(run_dir))
+    for month, events in records:
+        journal.append_month(month, month, events)
+    journal.close()
+    return journal.path
+
+def truncate_last_line(path, keep):
+    """
+    Cuts the file's last line after `keep` bytes, as a crash during the write would
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    last_start = data.rstrip(b'\n').rfind(b'\n') + 1
+    with open(path, 'wb') as f:
+        f.write(data[:last_start + keep])
+
+def test_latest_record_of_a_month_wins(tmp_path):
+    path = write_journal(tmp_path, [('2024-03', [event(1, 'Old')]), ('2024-02', []),
+                                    ('2024-03', [event(1, 'New')])])
+    assert [(month, [e['summary'] for e in events]) for month, events in journal_months(path)] == [
+        ('2024-03', ['New']), ('2024-02', [])]
+
+def test_truncated_last_line_keeps_previous_record(tmp_path):
+    path = write_journal(tmp_path, [('2024-03', [event(1, 'Carried'), event(2, 'Carried too')]),
+                                    ('2024-02', [event(3, 'February')]),
+                                    ('2024-03', [event(1, 'Refetched')])])
+    with open(path, 'rb') as f:
+        data = f.read()
+    last_line_length = len(data.rstrip(b'\n')) - data.rstrip(b'\n').rfind(b'\n') - 1
+    for keep in (5, 30, last_line_length - 1, last_line_length):
+        truncated = tmp_path / f'cut_{keep}.jsonl'
+        truncated.write_bytes(data)
+        truncate_last_line(truncated, keep)
+        months = dict(journal_months(str(truncated)))
+        # A complete record without its newline is still read, anything shorter falls back
+        expected = ['Refetched'] if keep == last_line_length else ['Carried', 'Carried too']
+        assert [e['summary'] for e in months['2024-03']] == expected
+        assert [e['summary'] for e in months['2024-02']] == ['February']
+
+def test_record_cut_just_before_its_newline(tmp_path):
+    path = write_journal(tmp_path, [('2024-03', [event(1, 'Carried')]), ('2024-03', [event(1, 'Refetched')])])
+    with open(path, 'rb') as f:
+        data = f.read()
+    # The cut-off line ends in '}' but its events array was never closed
+    cut = data[:data.rfind(b']')] + b'}'
+    with open(path, 'wb') as f:
+        f.write(cut)
+    assert [e['summary'] for e in journal_events(path)] == ['Carried']